@@ -1,9 +1,10 @@
 # app.py - Refined UI
-import io
-import json
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import streamlit as st
-import pikepdf
-from parser import parse_pdf
+from parser import PdfSession, parse_pdf
+from config import APP_PARSE_WORKERS, APP_INPROCESS_MAX_BYTES, RESULT_CACHE_ENTRIES
 
 st.set_page_config(page_title="Credit Card Statement Parser", layout="wide")
 
@@ -18,42 +19,166 @@ uploaded_files = st.file_uploader(
     help="Select one or more credit card statement PDFs"
 )
 
-def is_encrypted(raw_bytes: bytes) -> bool:
-    """Check if PDF is password protected."""
-    try:
-        with pikepdf.open(io.BytesIO(raw_bytes)) as pdf:
-            pass
-        return False
-    except pikepdf.PasswordError:
-        return True
-    except Exception as e:
-        st.warning(f"Could not verify PDF encryption status: {e}")
-        return False
-
-def test_password(raw_bytes: bytes, password: str) -> tuple[bool, str]:
+@st.cache_resource
+def get_executor() -> ProcessPoolExecutor:
+    """One parse pool per server process, shared by all reruns and sessions."""
+    return ProcessPoolExecutor(max_workers=APP_PARSE_WORKERS)
+
+@st.cache_resource
+def get_session_executor() -> ThreadPoolExecutor:
+    """Threads that parse small files on their already open PdfSession (OCR runs outside the GIL)."""
+    return ThreadPoolExecutor(max_workers=APP_PARSE_WORKERS, thread_name_prefix="parse")
+
+def file_digest(f) -> str:
+    """Content hash of an upload, computed once per uploaded file."""
+    digests = st.session_state.setdefault("file_digests", {})
+    file_id = getattr(f, "file_id", None) or f.name
+    if file_id not in digests:
+        digests[file_id] = hashlib.blake2b(f.getbuffer(), digest_size=16).hexdigest()
+    return digests[file_id]
+
+def lru_store(name: str) -> OrderedDict:
+    """A per-browser-session dict holding at most RESULT_CACHE_ENTRIES entries (see remember)."""
+    return st.session_state.setdefault(name, OrderedDict())
+
+def remember(store: OrderedDict, key, value):
+    store[key] = value
+    store.move_to_end(key)
+    while len(store) > RESULT_CACHE_ENTRIES:
+        store.popitem(last=False)
+
+def get_session(digest: str, f) -> PdfSession:
+    """One PdfSession per file content, kept across reruns: the encryption check runs once."""
+    sessions = st.session_state.setdefault("pdf_sessions", {})
+    if digest not in sessions:
+        sessions[digest] = PdfSession(f.getvalue(), filename=f.name)
+    return sessions[digest]
+
+def drop_stale_sessions(files):
     """
-    Test if password works for the PDF.
-    Returns (success, error_message)
+    Close the sessions of files no longer uploaded: each holds the whole upload and an open
+    document. A session still being parsed is closed on a later rerun.
     """
-    try:
-        with pikepdf.open(io.BytesIO(raw_bytes), password=password) as pdf:
-            pass
-        return True, ""
-    except pikepdf.PasswordError:
-        return False, "Incorrect password"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+    digests = st.session_state.setdefault("file_digests", {})
+    live_ids = {getattr(f, "file_id", None) or f.name for f in files}
+    for file_id in [i for i in digests if i not in live_ids]:
+        del digests[file_id]
+    live = set(digests.values())
+    jobs = st.session_state.get("parse_jobs", {})
+    for key in [k for k, job in jobs.items() if job.done() and k.split(":")[0] not in live]:
+        del jobs[key]
+    busy = {key.split(":")[0] for key in jobs if key.split(":")[0] not in live}
+    sessions = st.session_state.get("pdf_sessions", {})
+    for digest in [d for d in sessions if d not in live and d not in busy]:
+        sessions.pop(digest).close()
+
+def result_key(digest: str, password: str | None) -> str:
+    pw = hashlib.blake2b((password or "").encode("utf-8"), digest_size=8).hexdigest()
+    return f"{digest}:{pw}"
+
+def render_result(result: dict, session: PdfSession, is_pw_protected: bool, pw_key: str, pw_verified_key: str):
+    """Draw one parsed statement (or its error) into the current container."""
+    if not result.get("success"):
+        error_msg = result.get('error', 'Unknown error occurred')
+        st.error(error_msg)
+
+        # If password error, clear verification
+        if is_pw_protected and ("password" in error_msg.lower() or "encrypted" in error_msg.lower()):
+            if pw_verified_key in st.session_state:
+                del st.session_state[pw_verified_key]
+            if st.button("Re-enter password", key=f"retry_{pw_key}"):
+                session.lock()
+                if pw_key in st.session_state:
+                    del st.session_state[pw_key]
+                if pw_verified_key in st.session_state:
+                    del st.session_state[pw_verified_key]
+                st.rerun()
+        return
+
+    # Display results
+    issuer = result.get("issuer") or "UNKNOWN"
+    conf = int(100 * (result.get("issuer_confidence") or 0.0))
+
+    st.markdown(f"**Detected Issuer:** {issuer} ({conf}% confidence)")
+
+    records = result.get("records", [])
+    if not records:
+        st.warning("No card records found in this statement")
+        return
+
+    # Display each card record
+    for i, rec in enumerate(records, 1):
+        card_mask = rec.get('card_mask', '(unknown)')
+        st.markdown(f"#### Card {i} — {card_mask}")
+
+        c1, c2, c3 = st.columns(3)
+        c4, c5 = st.columns(2)
+
+        def show_field(col, label, key, is_money=False):
+            val = rec.get(key)
+            conf = rec.get("confidence", {}).get(key, 0.0)
+            page = rec.get("evidence", {}).get(key, {}).get("page")
+
+            conf_pct = int(conf * 100) if val is not None else 0
+
+            with col:
+                st.markdown(f"**{label}**")
+
+                if val is None:
+                    st.markdown("*Not found*")
+                else:
+                    shown = f"₹{val:,.2f}" if is_money else str(val)
+                    st.markdown(f"### {shown}")
+
+                # Confidence indicator
+                if conf_pct >= 90:
+                    st.progress(conf_pct / 100, text=f"Confidence: {conf_pct}%")
+                elif conf_pct >= 70:
+                    st.progress(conf_pct / 100, text=f"Confidence: {conf_pct}%")
+                elif conf_pct > 0:
+                    st.progress(conf_pct / 100, text=f"Low confidence: {conf_pct}%")
+                else:
+                    st.progress(0, text="Not detected")
+
+                if page:
+                    st.caption(f"Page {page}")
+
+        show_field(c1, "Card Last 4", "card_last", is_money=False)
+        show_field(c2, "Payment Due Date", "payment_due_date")
+        show_field(c3, "Total Amount Due", "total_amount_due", is_money=True)
+        show_field(c4, "Minimum Amount Due", "minimum_amount_due", is_money=True)
+        show_field(c5, "Available Credit Limit", "available_credit_limit", is_money=True)
+
+        # Evidence section
+        with st.expander("View extraction details"):
+            evidence = rec.get("evidence", {})
+            if evidence:
+                st.json(evidence)
+            else:
+                st.caption("No evidence data available")
+
+        if i < len(records):
+            st.divider()
+
+drop_stale_sessions(uploaded_files or [])
 
 if uploaded_files:
+    results = lru_store("parse_results")
+    jobs = st.session_state.setdefault("parse_jobs", {})
+    pending = []  # (job, placeholder, key, render args) for statements still being parsed
+
     for file_idx, f in enumerate(uploaded_files):
         with st.container(border=True):
             st.subheader(f.name)
             
-            # Read file bytes once
-            raw_bytes = f.read()
+            # Open the PDF once per content hash; reruns reuse the session
+            digest = file_digest(f)
+            session = get_session(digest, f)
+            if session.error and not session.is_encrypted:
+                st.warning(f"Could not verify PDF encryption status: {session.error}")
             
             # Check if encrypted
-            is_pw_protected = is_encrypted(raw_bytes)
+            is_pw_protected = session.is_encrypted
             
             # Session state keys for this file
             pw_key = f"password_{file_idx}_{f.name}"
@@ -88,7 +213,7 @@ if uploaded_files:
                     
                     if verify_clicked and entered_pw:
                         with st.spinner("Verifying..."):
-                            success, error_msg = test_password(raw_bytes, entered_pw)
+                            success, error_msg = session.unlock(entered_pw)
                             
                             if success:
                                 st.session_state[pw_key] = entered_pw
@@ -113,98 +238,47 @@ if uploaded_files:
                         st.success("PDF unlocked")
                     with col2:
                         if st.button("Clear password", key=f"lock_{pw_key}"):
+                            session.lock()
+                            for k in [k for k in results if k.startswith(digest)]:
+                                del results[k]
                             del st.session_state[pw_key]
                             del st.session_state[pw_verified_key]
                             st.rerun()
             
-            # Parse the PDF
-            with st.spinner("Parsing statement..."):
-                try:
-                    result = parse_pdf(io.BytesIO(raw_bytes), password=password, filename=f.name)
-                except Exception as e:
-                    st.error(f"Error parsing PDF: {str(e)}")
-                    continue
-            
-            if not result.get("success"):
-                error_msg = result.get('error', 'Unknown error occurred')
-                st.error(error_msg)
-                
-                # If password error, clear verification
-                if is_pw_protected and ("password" in error_msg.lower() or "encrypted" in error_msg.lower()):
-                    if pw_verified_key in st.session_state:
-                        del st.session_state[pw_verified_key]
-                    if st.button("Re-enter password", key=f"retry_{pw_key}"):
-                        if pw_key in st.session_state:
-                            del st.session_state[pw_key]
-                        if pw_verified_key in st.session_state:
-                            del st.session_state[pw_verified_key]
-                        st.rerun()
-                continue
-            
-            # Display results
-            issuer = result.get("issuer") or "UNKNOWN"
-            conf = int(100 * (result.get("issuer_confidence") or 0.0))
-            
-            st.markdown(f"**Detected Issuer:** {issuer} ({conf}% confidence)")
-            
-            records = result.get("records", [])
-            if not records:
-                st.warning("No card records found in this statement")
+            # Every uncached file is submitted before any result is awaited: small files to a
+            # thread that parses the session already open (and unlocked), larger ones to the
+            # process pool. Results are memoized per content + password
+            key = result_key(digest, password)
+            render_args = (session, is_pw_protected, pw_key, pw_verified_key)
+            result = results.get(key)
+            if result is None:
+                job = jobs.get(key)
+                if job is None:
+                    if f.size <= APP_INPROCESS_MAX_BYTES or session.error:  # errors return at once
+                        job = get_session_executor().submit(session.parse, password, 1)
+                    else:
+                        job = get_executor().submit(parse_pdf, f.getvalue(), password, f.name)
+                    jobs[key] = job
+                placeholder = st.empty()
+                placeholder.info("Parsing statement...")
+                pending.append((job, placeholder, key, render_args))
                 continue
             
-            # Display each card record
-            for i, rec in enumerate(records, 1):
-                card_mask = rec.get('card_mask', '(unknown)')
-                st.markdown(f"#### Card {i} — {card_mask}")
-                
-                c1, c2, c3 = st.columns(3)
-                c4, c5 = st.columns(2)
-                
-                def show_field(col, label, key, is_money=False):
-                    val = rec.get(key)
-                    conf = rec.get("confidence", {}).get(key, 0.0)
-                    page = rec.get("evidence", {}).get(key, {}).get("page")
-                    
-                    conf_pct = int(conf * 100) if val is not None else 0
-                    
-                    with col:
-                        st.markdown(f"**{label}**")
-                        
-                        if val is None:
-                            st.markdown("*Not found*")
-                        else:
-                            shown = f"₹{val:,.2f}" if is_money else str(val)
-                            st.markdown(f"### {shown}")
-                        
-                        # Confidence indicator
-                        if conf_pct >= 90:
-                            st.progress(conf_pct / 100, text=f"Confidence: {conf_pct}%")
-                        elif conf_pct >= 70:
-                            st.progress(conf_pct / 100, text=f"Confidence: {conf_pct}%")
-                        elif conf_pct > 0:
-                            st.progress(conf_pct / 100, text=f"Low confidence: {conf_pct}%")
-                        else:
-                            st.progress(0, text="Not detected")
-                        
-                        if page:
-                            st.caption(f"Page {page}")
-                
-                show_field(c1, "Card Last 4", "card_last", is_money=False)
-                show_field(c2, "Payment Due Date", "payment_due_date")
-                show_field(c3, "Total Amount Due", "total_amount_due", is_money=True)
-                show_field(c4, "Minimum Amount Due", "minimum_amount_due", is_money=True)
-                show_field(c5, "Available Credit Limit", "available_credit_limit", is_money=True)
-                
-                # Evidence section
-                with st.expander("View extraction details"):
-                    evidence = rec.get("evidence", {})
-                    if evidence:
-                        st.json(evidence)
-                    else:
-                        st.caption("No evidence data available")
-                
-                if i < len(records):
-                    st.divider()
+            results.move_to_end(key)  # most recently shown is evicted last
+            render_result(result, *render_args)
+
+    # Fill in each statement as soon as its parse finishes (never wait on the slowest file first)
+    by_job = {job: (placeholder, key, args) for job, placeholder, key, args in pending}
+    for job in as_completed(by_job):
+        placeholder, key, args = by_job[job]
+        jobs.pop(key, None)
+        try:
+            result = job.result()
+            remember(results, key, result)
+        except Exception as e:
+            result = {"success": False, "error": f"Error parsing PDF: {str(e)}"}
+        with placeholder.container():
+            render_result(result, *args)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,178 @@
+# batch.py
+# Command-line batch runner: parse a folder (or manifest) of statements into JSONL.
+#
+#   python batch.py statements/ -o results.jsonl --workers 8
+#   python batch.py manifest.csv -o results.jsonl        # CSV/JSONL rows: path,password
+#
+# One JSON line is written per document as soon as it finishes. Files already present
+# in the output are skipped, so re-running the same command resumes a crashed run.
+# A worker that dies (crash, out of memory) is recorded as a "worker_crash" failure and the
+# run goes on; those files are parsed again on the next run, other failures only with
+# --retry-failed.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from parser import parse_pdf
+
+def _read_manifest(path: str, default_password: str | None) -> list[tuple[str, str | None]]:
+    """CSV (header: path,password) or JSONL ({"path": ..., "password": ...}); paths relative to the manifest."""
+    base = os.path.dirname(os.path.abspath(path))
+    rows = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.lower().endswith((".jsonl", ".json")):
+            items = (json.loads(line) for line in fh if line.strip())
+        else:
+            items = csv.DictReader(fh)
+        for item in items:
+            p = (item.get("path") or "").strip()
+            if not p:
+                continue
+            rows.append((os.path.join(base, p), item.get("password") or default_password))
+    return rows
+
+def _walk_dir(root: str, default_password: str | None) -> list[tuple[str, str | None]]:
+    jobs = []
+    for dirpath, _dirs, names in os.walk(root):
+        for name in sorted(names):
+            if name.lower().endswith(".pdf"):
+                jobs.append((os.path.join(dirpath, name), default_password))
+    jobs.sort()
+    return jobs
+
+def _load_checkpoint(out_path: str, retry_failed: bool = False) -> set[str]:
+    """
+    Files already finished in the output (the last line per file counts): successes, and
+    failures other than worker crashes unless retry_failed. A torn last line (crash
+    mid-write) is cut off.
+    """
+    status = {}
+    if not os.path.exists(out_path):
+        return set()
+    with open(out_path, "rb+") as fh:
+        data = fh.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            fh.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            res = json.loads(line)
+            status[res["file"]] = (bool(res.get("success")), res.get("error_type"))
+        except (ValueError, KeyError):
+            continue
+    return {f for f, (ok, error_type) in status.items()
+            if ok or not (retry_failed or error_type == "worker_crash")}
+
+def _run_one(path: str, password: str | None) -> dict:
+    """Worker: parse one file and return its output line."""
+    t0 = time.perf_counter()
+    try:
+        result = parse_pdf(path, password, filename=os.path.basename(path))
+    except Exception as e:
+        result = {"success": False, "error_type": "exception", "error": str(e), "records": []}
+    result["file"] = path
+    result["seconds"] = round(time.perf_counter() - t0, 4)
+    return result
+
+def _crashed(path: str, e: BaseException) -> dict:
+    return {"success": False, "error_type": "worker_crash", "error": f"{type(e).__name__}: {e}",
+            "records": [], "file": path}
+
+def run(jobs: list[tuple[str, str | None]], out_path: str, workers: int, retry_failed: bool = False) -> dict:
+    done = _load_checkpoint(out_path, retry_failed)
+    todo = [(p, pw) for p, pw in jobs if p not in done]
+    summary = {"docs": 0, "failed": 0, "crashed": 0, "skipped": len(jobs) - len(todo), "pages": 0,
+               "ocr_pages": 0, "ocr_preflight_pages": 0, "layout_fallbacks": 0}
+    t0 = time.perf_counter()
+
+    def record(res: dict):
+        out.write(json.dumps(res, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+        stats = res.get("stats") or {}
+        summary["docs"] += 1
+        summary["failed"] += not res.get("success")
+        summary["crashed"] += res.get("error_type") == "worker_crash"
+        # pages touched: a region crop that fills every field materializes no full page
+        summary["pages"] += stats.get("pages_materialized", 0) + stats.get("region_pages", 0)
+        summary["ocr_pages"] += stats.get("ocr_pages", 0)
+        summary["ocr_preflight_pages"] += stats.get("ocr_preflight_pages", 0)
+        summary["layout_fallbacks"] += stats.get("layout_fallbacks", 0)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with open(out_path, "a", encoding="utf-8") as out:
+            queue = iter(todo)
+            running = {}  # future -> path
+            while True:
+                # keep a bounded number of files in flight so huge folders don't pile up futures
+                while len(running) < workers * 4:
+                    nxt = next(queue, None)
+                    if nxt is None:
+                        break
+                    running[pool.submit(_run_one, *nxt)] = nxt[0]
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for fut in finished:
+                    path = running.pop(fut)
+                    try:
+                        record(fut.result())
+                    except Exception as e:  # the worker process died: BrokenProcessPool, MemoryError...
+                        record(_crashed(path, e))
+                        broken = broken or isinstance(e, BrokenProcessPool)
+                if broken:
+                    # a dead worker breaks the pool: the other files in flight fail with it (and
+                    # are retried on the next run); the rest of the queue gets a fresh pool
+                    for fut, path in running.items():
+                        exc = fut.exception()
+                        record(fut.result() if exc is None else _crashed(path, exc))
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    summary["seconds"] = round(elapsed, 3)
+    summary["docs_per_sec"] = round(summary["docs"] / elapsed, 3) if elapsed else 0.0
+    summary["pages_per_sec"] = round(summary["pages"] / elapsed, 3) if elapsed else 0.0
+    summary["ocr_share"] = round(summary["ocr_pages"] / summary["pages"], 3) if summary["pages"] else 0.0
+    return summary
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Parse a folder or manifest of credit card statements to JSONL")
+    ap.add_argument("input", help="directory of PDFs, or a .csv/.jsonl manifest with path,password")
+    ap.add_argument("-o", "--output", required=True, help="JSONL output (also the resume checkpoint)")
+    ap.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("-p", "--password", default=None, help="password for files without one in the manifest")
+    ap.add_argument("--retry-failed", action="store_true",
+                    help="parse files whose last output line is a failure again (worker crashes always are)")
+    args = ap.parse_args(argv)
+
+    if os.path.isdir(args.input):
+        jobs = _walk_dir(args.input, args.password)
+    else:
+        jobs = _read_manifest(args.input, args.password)
+
+    summary = run(jobs, args.output, max(1, args.workers), args.retry_failed)
+    print(
+        f"{summary['docs']} docs ({summary['failed']} failed, {summary['crashed']} of them worker crashes, "
+        f"{summary['skipped']} already done) "
+        f"in {summary['seconds']:.1f}s | {summary['docs_per_sec']:.2f} docs/s | "
+        f"{summary['pages_per_sec']:.2f} pages/s | OCR share {100 * summary['ocr_share']:.1f}% "
+        f"({summary['ocr_preflight_pages']} image-only by preflight) | "
+        f"{summary['layout_fallbacks']} pages needed word boxes",
+        file=sys.stderr,
+    )
+    if summary["docs"] > summary["failed"] and not summary["pages"]:
+        print("warning: documents parsed but no pages counted; pages/s is meaningless", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
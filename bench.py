@@ -0,0 +1,297 @@
+# bench.py
+# Performance benchmarks. Run one of:
+#   python bench.py suite [--pages 1,10,100] [--scanned] [--save|--compare]
+#       synthetic statements for every issuer: plain/encrypted x text/scanned x page counts;
+#       times every parse_pdf stage, records a JSON baseline, flags regressions against it.
+#       Baselines are machine-specific and not committed: `suite --save` on the base revision
+#       writes bench_baseline.json, then `suite --compare` on the change checks against it.
+#       Throughput counts pages touched (full pages plus the region crop).
+#   python bench.py ocr statement.pdf [more.pdf ...]   per-page vs batched Tesseract on scanned pages
+#   python bench.py dates [--n 200000]   compiled parse_date vs the strptime reference:
+#       differential check on generated tokens (exit 1 on any mismatch), then timings
+#   python bench.py fuzz [--sizes 2000,8000,32000]   OCR-garbage pages (digit, comma and X
+#       runs...) through every extractor, as text-layer and as OCR pages (approximate label
+#       matching); exit 1 if the per-char cost grows with page size
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import pdfplumber
+import utils
+import extractors
+from page import Page
+from utils import open_source, _ocr_page, _ocr_pages_batch
+from parser import parse_pdf, clear_result_cache
+from config import ISSUERS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+def _scanned_pages(pdf):
+    """pdfplumber pages with no text layer (the ones that go to OCR)."""
+    out = []
+    for page in pdf.pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        if not text.strip():
+            out.append(page)
+    return out
+
+def bench_ocr(paths: list[str]) -> int:
+    """Compare one Tesseract process per page against one batched run per document."""
+    utils.OCR_CACHE = None  # time Tesseract, not cache hits
+    total_single = total_batch = 0.0
+    total_pages = 0
+    for path in paths:
+        with pdfplumber.open(open_source(path)) as pdf:
+            pages = _scanned_pages(pdf)
+            if not pages:
+                print(f"{path}: no scanned pages, skipped")
+                continue
+
+            t0 = time.perf_counter()
+            single = [_ocr_page(p) for p in pages]
+            t_single = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            batch = _ocr_pages_batch(pages)
+            t_batch = time.perf_counter() - t0
+
+        same = sum(a[0].split() == b[0].split() for a, b in zip(single, batch))
+        print(f"{path}: {len(pages)} scanned pages | per-page {t_single:.2f}s | "
+              f"batched {t_batch:.2f}s | x{t_single / max(t_batch, 1e-9):.2f} | "
+              f"identical text on {same}/{len(pages)} pages")
+        total_single += t_single; total_batch += t_batch; total_pages += len(pages)
+
+    if total_pages:
+        print(f"TOTAL: {total_pages} pages | per-page {total_single:.2f}s "
+              f"({total_single / total_pages:.2f}s/page) | batched {total_batch:.2f}s "
+              f"({total_batch / total_pages:.2f}s/page)")
+    return 0
+
+# ---------------------------- synthetic suite ----------------------------
+
+def _cases(page_counts: list[int], scanned: bool):
+    for issuer in ISSUERS:
+        for pages in page_counts:
+            for is_scanned in ((False, True) if scanned else (False,)):
+                for encrypted in (False, True):
+                    kind = "scanned" if is_scanned else "text"
+                    name = f"{issuer}/{kind}/{'enc' if encrypted else 'plain'}/{pages}p"
+                    yield name, dict(issuer=issuer, pages=pages, scanned=is_scanned, encrypted=encrypted)
+
+def _run_case(spec: dict, repeat: int) -> dict:
+    from synthetic import make_statement, statement_truth, PASSWORD
+    pdf = make_statement(spec["issuer"], spec["pages"], spec["scanned"], spec["encrypted"])
+    password = PASSWORD if spec["encrypted"] else None
+    utils.OCR_CACHE = None
+    walls, stages, result = [], {}, None
+    for _ in range(repeat):
+        clear_result_cache()  # time the real pipeline, not the result cache
+        t0 = time.perf_counter()
+        result = parse_pdf(pdf, password, timings=True)
+        walls.append(time.perf_counter() - t0)
+        for name, st in result["timings"]["stages"].items():
+            stages.setdefault(name, []).append(st["wall"])
+
+    truth = statement_truth(spec["issuer"])
+    rec = (result.get("records") or [{}])[0]
+    correct = sum(rec.get(k) == v for k, v in truth.items())
+    stats = result.get("stats") or {}
+    wall = statistics.median(walls)
+    # a region crop that fills every field materializes no full page, but it is still work done
+    touched = stats.get("pages_materialized", 0) + stats.get("region_pages", 0)
+    return {
+        "wall": round(wall, 6),
+        "docs_per_sec": round(1 / wall, 3) if wall else 0.0,
+        "pages_per_sec": round(touched / wall, 3) if wall else 0.0,
+        "bytes": len(pdf),
+        "pages_touched": touched,
+        "pages_materialized": stats.get("pages_materialized", 0),
+        "ocr_pages": stats.get("ocr_pages", 0),
+        "ocr_preflight_pages": stats.get("ocr_preflight_pages", 0),
+        "issuer_ok": result.get("issuer") == spec["issuer"],
+        "fields_correct": f"{correct}/{len(extractors.FIELDS)}",
+        "stages": {k: round(statistics.median(v), 6) for k, v in stages.items()},
+    }
+
+def bench_suite(page_counts: list[int], scanned: bool, repeat: int,
+                save: bool, compare: bool, tolerance: float) -> int:
+    results = {}
+    for name, spec in _cases(page_counts, scanned):
+        r = _run_case(spec, repeat)
+        results[name] = r
+        top = sorted(r["stages"].items(), key=lambda kv: -kv[1])[:3]
+        print(f"{name:28s} {1000 * r['wall']:9.1f} ms  {r['pages_per_sec']:8.1f} p/s  "
+              f"issuer {'ok' if r['issuer_ok'] else 'WRONG'}  fields {r['fields_correct']}  "
+              f"[{', '.join(f'{k} {1000 * v:.1f}ms' for k, v in top)}]")
+
+    regressions = []
+    if compare:
+        if not os.path.exists(BASELINE_PATH):
+            print(f"no baseline at {BASELINE_PATH}: baselines are machine-specific and not committed; "
+                  f"record one on this machine from the base revision with `python bench.py suite --save` "
+                  f"(same --pages/--scanned), then rerun with --compare")
+            return 1
+        with open(BASELINE_PATH, encoding="utf-8") as fh:
+            base = json.load(fh)["results"]
+        for name, r in results.items():
+            b = base.get(name)
+            if not b:
+                print(f"{name}: not in the baseline, not compared")
+                continue
+            if r["wall"] > b["wall"] * (1 + tolerance):
+                regressions.append(f"{name}: latency {1000 * b['wall']:.1f} -> {1000 * r['wall']:.1f} ms")
+            if not (r["pages_per_sec"] and b.get("pages_per_sec")):
+                # every parse touches at least one page: zero means a broken run or a stale baseline
+                regressions.append(f"{name}: zero throughput (baseline {b.get('pages_per_sec', 0.0)}, "
+                                   f"now {r['pages_per_sec']} pages/s)")
+            elif r["pages_per_sec"] < b["pages_per_sec"] / (1 + tolerance):
+                regressions.append(f"{name}: throughput {b['pages_per_sec']:.1f} -> {r['pages_per_sec']:.1f} pages/s")
+        for line in regressions:
+            print("REGRESSION " + line)
+        print(f"{len(regressions)} regression(s) beyond {100 * tolerance:.0f}% against {BASELINE_PATH}")
+
+    if save:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as fh:
+            json.dump({
+                "python": platform.python_version(), "machine": platform.machine(),
+                "recorded": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": repeat,
+                "results": results,
+            }, fh, indent=2, sort_keys=True)
+        print(f"baseline written to {BASELINE_PATH}")
+    return 1 if regressions else 0
+
+def _date_samples(n: int, seed: int) -> list[str]:
+    """Date-like strings in every shape parse_date looks for, valid and invalid."""
+    rnd = random.Random(seed)
+    months = ["Jan", "January", "SEPT", "Sep", "sept", "september", "May", "Feb", "FEBRUARY", "Dec", "Foo", "June"]
+    num = lambda lo, hi: "".join(rnd.choice("0123456789") for _ in range(rnd.randint(lo, hi)))
+    shapes = [
+        lambda: f"{num(1, 3)}{rnd.choice('/-')}{num(1, 3)}{rnd.choice('/-')}{num(1, 5)}",
+        lambda: f"{num(1, 2)}{rnd.choice([' ', '  ', chr(9)])}{rnd.choice(months)} {num(1, 5)}",
+        lambda: f"{rnd.choice(months)} {num(1, 3)}{rnd.choice(['', ','])}{rnd.choice(['', ' '])}{num(3, 5)}",
+        lambda: f"{num(4, 4)}-{num(2, 2)}-{num(2, 2)}",
+        lambda: rnd.choice(["29/02/2024", "29/02/1900", "31/04/2024", "1/1/0000", "Feb 29, 2100", "5 Sep 22"]),
+    ]
+    out = []
+    for _ in range(n):
+        s = " ".join(rnd.choice(shapes)() for _ in range(rnd.randint(1, 3)))
+        out.append(f"Due {s} x" if rnd.random() < 0.3 else s)
+    return out
+
+def bench_dates(n: int, seed: int = 0) -> int:
+    """parse_date must match _parse_date_strptime exactly; also report the speedup."""
+    samples = _date_samples(n, seed)
+    mismatches = [(s, a, b) for s in samples
+                  if (a := utils._parse_date_strptime(s)) != (b := utils.parse_date(s))]
+    for s, a, b in mismatches[:20]:
+        print(f"MISMATCH {s!r}: strptime {a} compiled {b}")
+    print(f"{len(samples)} samples, {len(mismatches)} mismatch(es)")
+
+    t0 = time.perf_counter()
+    for s in samples:
+        utils._parse_date_strptime(s)
+    t_ref = time.perf_counter() - t0
+    utils.parse_date.cache_clear()
+    t0 = time.perf_counter()
+    for s in samples:
+        utils.parse_date(s)
+    t_cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for s in samples:
+        utils.parse_date(s)
+    t_warm = time.perf_counter() - t0
+    print(f"strptime {1e6 * t_ref / n:.2f} us/date | compiled {1e6 * t_cold / n:.2f} us/date "
+          f"({t_ref / t_cold:.1f}x) | memoized {1e6 * t_warm / n:.2f} us/date")
+    return 1 if mismatches else 0
+
+_FUZZ_LABELS = "Total Amount Due Minimum Amount Due Payment Due Date Card No Available Credit Limit "
+_FUZZ_KINDS = {
+    # repeated units that once drove a pattern into quadratic backtracking, plus mixed noise
+    "x-run": "X", "mask-run": "x*", "digit-run": "1", "comma-run": "1,", "slash-run": "12/",
+    "letter-run": "a", "month-run": "Sep", "spaced-digits": "1 ", "newlines": "\n", "rupee-run": "Rs.",
+    "noise": None,
+}
+
+def _fuzz_text(kind: str, n: int, rnd: random.Random) -> str:
+    unit = _FUZZ_KINDS[kind]
+    if unit is None:
+        body = "".join(rnd.choice("0123456789,.Xx* /-\n₹`Rs") for _ in range(n))
+    else:
+        body = unit * (n // len(unit))
+    return _FUZZ_LABELS + body
+
+def bench_fuzz(sizes: list[int], max_growth: float, seed: int = 0) -> int:
+    """
+    Every extractor on one garbage page per kind and size, as a text-layer page and as an
+    OCR page (which adds the approximate label scan); the us/char must stay flat.
+    """
+    fns = [getattr(extractors, n) for n in dir(extractors) if n.startswith("extract_")]
+    rnd = random.Random(seed)
+    failed = []
+    print(f"{'kind':18}" + "".join(f"{n:>12}" for n in sizes) + "   (us/char)")
+    for kind in _FUZZ_KINDS:
+        texts = [_fuzz_text(kind, n, rnd) for n in sizes]
+        for ocr in (False, True):
+            name = kind + ("/ocr" if ocr else "")
+            per_char = []
+            for text in texts:
+                best = float("inf")
+                for _ in range(3):
+                    t0 = time.perf_counter()
+                    for fn in fns:
+                        fn([Page(1, text, ocr=ocr)], {})
+                    best = min(best, time.perf_counter() - t0)
+                per_char.append(1e6 * best / len(text))
+            growth = per_char[-1] / per_char[0]
+            flag = ""
+            if growth > max_growth:
+                failed.append(name)
+                flag = f"   <-- {growth:.1f}x"
+            print(f"{name:18}" + "".join(f"{c:12.3f}" for c in per_char) + flag)
+    print(f"{len(failed)} case(s) with per-char cost growing more than {max_growth}x: {', '.join(failed) or '-'}")
+    return 1 if failed else 0
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Credit card parser benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_suite = sub.add_parser("suite", help="synthetic statements for all issuers, per-stage timings")
+    p_suite.add_argument("--pages", default="1,10,100", help="comma-separated page counts")
+    p_suite.add_argument("--scanned", action="store_true", help="also run image-only (OCR) variants")
+    p_suite.add_argument("--repeat", type=int, default=3, help="runs per case (median is kept)")
+    p_suite.add_argument("--save", action="store_true", help="write results as the new baseline")
+    p_suite.add_argument("--compare", action="store_true", help="fail on regressions against the baseline")
+    p_suite.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    p_ocr = sub.add_parser("ocr", help="per-page vs batched Tesseract on scanned pages")
+    p_ocr.add_argument("pdfs", nargs="+")
+    p_dates = sub.add_parser("dates", help="compiled parse_date vs strptime: differential check + timing")
+    p_dates.add_argument("--n", type=int, default=200_000, help="generated date strings")
+    p_dates.add_argument("--seed", type=int, default=0)
+    p_fuzz = sub.add_parser("fuzz", help="worst-case extractor latency on OCR-garbage pages")
+    p_fuzz.add_argument("--sizes", default="2000,8000,32000", help="comma-separated page sizes (chars)")
+    p_fuzz.add_argument("--max-growth", type=float, default=3.0,
+                        help="allowed per-char slowdown from the smallest to the largest size")
+    p_fuzz.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "suite":
+        pages = [int(x) for x in args.pages.split(",") if x.strip()]
+        return bench_suite(pages, args.scanned, max(1, args.repeat), args.save, args.compare, args.tolerance)
+    if args.cmd == "ocr":
+        return bench_ocr(args.pdfs)
+    if args.cmd == "dates":
+        return bench_dates(max(1, args.n), args.seed)
+    if args.cmd == "fuzz":
+        sizes = sorted(int(x) for x in args.sizes.split(",") if x.strip())
+        return bench_fuzz(sizes, args.max_growth, args.seed)
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
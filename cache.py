@@ -0,0 +1,116 @@
+# cache.py
+# LRU caches: in-memory (entry count bound) and on-disk JSON files (byte bound).
+# Used for OCR results and whole-document parse results.
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any
+
+class MemoryLRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        value = self._data.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self.stats["writes"] += 1
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._data.clear()
+
+# On disk: one file per key, recency is the file mtime (refreshed on every hit).
+class DiskLRUCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _files(self):
+        for root, _dirs, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            old = os.path.getsize(path)
+        except OSError:
+            old = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(value, fh, ensure_ascii=False)
+            os.replace(tmp, path)  # atomic: concurrent readers never see half a file
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+        self.stats["writes"] += 1
+        self._size += os.path.getsize(path) - old
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until the cache is back under 90% of max_bytes."""
+        entries = []
+        for p in self._files():
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        self._size = sum(e[1] for e in entries)
+        target = int(self.max_bytes * 0.9)
+        for _mtime, size, p in entries:
+            if self._size <= target:
+                break
+            try:
+                os.unlink(p)
+            except OSError:
+                continue
+            self._size -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        for p in list(self._files()):
+            try:
+                os.unlink(p)
+            except OSError:
+                pass
+        self._size = 0
@@ -1,6 +1,8 @@
 # config.py
 # Bank keywords + rich label dictionaries + negative contexts
 
+import os
+
 ISSUERS = {
     "IDFC":  {"keywords": ["idfc first", "idfc bank", "idfc first bank"]},
     "HDFC":  {"keywords": ["hdfc bank", "paytm hdfc", "hdfc credit card"]},
@@ -80,5 +82,67 @@ BANK_LABELS = {
     }
 }
 
+# lazy page pipeline: issuer detection reads metadata + page 1 and pulls further pages only
+# while the confidence stays below ISSUER_MIN_CONFIDENCE; keywords within the first
+# ISSUER_HEADER_CHARS characters of a page count as header hits.
+# Field extraction stops pulling pages once every field is found at EARLY_STOP_CONFIDENCE or better
+ISSUER_MIN_CONFIDENCE = 0.6
+ISSUER_HEADER_CHARS = 400
+# generator fingerprints (producer/creator/fonts/page size) learned from complete parses;
+# trusted after FINGERPRINT_MIN_SEEN agreeing parses. Kept in memory unless a path is given
+FINGERPRINT_TABLE_PATH = os.environ.get("CC_PARSER_FINGERPRINTS") or None
+FINGERPRINT_MIN_SEEN = 2
+
+# summary box per issuer: page number and (x0, top, x1, bottom) as fractions of the page.
+# When the issuer is known before extraction (fingerprint or metadata), only this crop is
+# read first; full pages follow only for fields not found in it
+LAYOUT_TEMPLATES = {
+    "IDFC":  {"page": 1, "bbox": (0.0, 0.0, 1.0, 0.5)},
+    "HDFC":  {"page": 1, "bbox": (0.0, 0.0, 1.0, 0.5)},
+    "SBI":   {"page": 1, "bbox": (0.0, 0.0, 1.0, 0.55)},
+    "AXIS":  {"page": 1, "bbox": (0.0, 0.0, 1.0, 0.5)},
+    "ICICI": {"page": 1, "bbox": (0.0, 0.0, 1.0, 0.45)},
+}
+EARLY_STOP_CONFIDENCE = 0.85
+
+# opt-in parallel page extraction / OCR: worker processes per document (0 or 1 = serial),
+# only for documents with at least PARALLEL_MIN_PAGES pages
+PARALLEL_WORKERS = 0
+PARALLEL_MIN_PAGES = 4
+PARALLEL_CHUNKS_PER_WORKER = 2  # smaller page ranges balance uneven OCR load
+
+# OCR: raster resolution, and how many consecutive scanned pages share one Tesseract process.
+# The lazy pipeline starts with single pages and doubles the batch only while pages keep being
+# asked for, so an early stop OCRs at most about twice the pages it used; full-document
+# extraction (parallel workers, extract_pages) batches OCR_BATCH_PAGES from the start
+OCR_DPI = 300
+OCR_BATCH_PAGES = 8
+# OCR pages: labels with no exact hit are matched approximately, allowing one edit
+# (wrong, missing or extra char) per OCR_LABEL_CHARS_PER_ERROR label chars, at most
+# OCR_LABEL_MAX_ERRORS; labels shorter than that are matched exactly only
+OCR_LABEL_MAX_ERRORS = 2
+OCR_LABEL_CHARS_PER_ERROR = 7
+# on-disk OCR cache keyed by rendered-page hash; off unless a directory is given,
+# since it stores statement text on disk
+OCR_CACHE_DIR = os.environ.get("CC_PARSER_OCR_CACHE") or None
+OCR_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# whole-document parse results: in-memory LRU (entries) + optional on-disk tier
+RESULT_CACHE_ENTRIES = 128
+RESULT_CACHE_DIR = os.environ.get("CC_PARSER_RESULT_CACHE") or None
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Streamlit app: statements parsed concurrently in a process pool of this size
+APP_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+# files up to this size are parsed by app threads (as many as APP_PARSE_WORKERS), on the
+# session already opened (and unlocked) for the password check, instead of being reopened
+# and decrypted by a worker process
+APP_INPROCESS_MAX_BYTES = 2 * 1024 * 1024
+
 # regex windows / sizes
 SEARCH_WINDOW_CHARS = 220
+
+# ingestion: decrypted output larger than this is spooled to a temp file instead of RAM
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+# attach "peak_memory_bytes" (tracemalloc) to every parse_pdf result; costs some speed
+REPORT_PEAK_MEMORY = False
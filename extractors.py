@@ -1,11 +1,22 @@
 # extractors.py - COMPLETE FIXED VERSION
 import re
+from bisect import bisect_left
 from typing import List, Dict, Tuple, Optional
-from config import GENERIC_LABELS, BANK_LABELS, SEARCH_WINDOW_CHARS, CARD_NEGATIVE_CONTEXT
-from utils import parse_amount, parse_date, last_tail
+from config import (
+    GENERIC_LABELS, BANK_LABELS, SEARCH_WINDOW_CHARS, CARD_NEGATIVE_CONTEXT, EARLY_STOP_CONFIDENCE,
+    OCR_LABEL_MAX_ERRORS, OCR_LABEL_CHARS_PER_ERROR,
+)
+from utils import scan_amounts, match_amount, parse_date, last_tail
+from labelscan import scanner_for, fuzzy_scanner_for
+from layout import WordIndex
+from page import Page
+
+# Bump whenever extraction output can change for the same input (invalidates cached results)
+EXTRACTOR_VERSION = "8"
 
-# Support both rupee encodings that appear in PDFs
-AMOUNT_TOKEN = r"[₹`]?\s*[\d,]+(?:\.\d{1,2})?"
+DATE_TOKEN = r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|(?<![A-Za-z])[A-Za-z]{3,}\s+\d{1,2},?\s+\d{4}|\d{4}-\d{2}-\d{2}"
+_DATE_RE = re.compile(DATE_TOKEN, re.IGNORECASE)
+_NO_PAYMENT_RE = re.compile(r"\bNO PAYMENT (REQUIRED|DUE)\b", re.IGNORECASE)
 
 # --------------------------- helpers (text-window) ---------------------------
 
@@ -14,43 +25,79 @@ def _window_after_label(full_text: str, label: str, start_idx: int) -> str:
     j = start_idx + len(label)
     return full_text[j:j + SEARCH_WINDOW_CHARS]
 
-def _find_after_label(text: str, labels: List[str], value_pat: str, page_num: int):
-    low = text.lower()
+def _label_hits(page: Page, labels: List[str], hits: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """First position of each label; taken from the page's one-pass label scan when available."""
+    if hits is not None:
+        return hits
+    low = page.lower
+    found = {}
+    for lbl in labels:
+        idx = low.find(lbl.lower())
+        if idx != -1:
+            found[lbl.lower()] = idx
+    return found
+
+def _find_after_label(page: Page, labels: List[str], value_re: re.Pattern, hits=None):
+    text = page.text
+    hits = _label_hits(page, labels, hits)
     for lbl in labels:
-        lbl_low = lbl.lower()
-        idx = low.find(lbl_low)
+        idx = hits.get(lbl.lower(), -1)
         if idx == -1:
             continue
 
         # primary: immediately after the label
-        win = _window_after_label(text, lbl, idx)
-        m = re.search(value_pat, win, flags=re.IGNORECASE)
-        if m:
-            return m.group(0), {"snippet": win[:180], "page": page_num}
+        j = idx + len(lbl)
+        v = page.search(value_re, j, j + SEARCH_WINDOW_CHARS)
+        if v is not None:
+            return v, {"snippet": _window_after_label(text, lbl, idx)[:180], "page": page.page_num}
 
         # secondary: also look in the next 2 "lines"
-        lines = re.split(r"[\r\n]+", text[idx: idx + SEARCH_WINDOW_CHARS])
-        if len(lines) >= 2:
-            blk = " ".join(lines[1:3])
-            m2 = re.search(value_pat, blk, flags=re.IGNORECASE)
+        lines = page.lines_after(idx, idx + SEARCH_WINDOW_CHARS)
+        if lines:
+            blk = " ".join(lines)
+            m2 = value_re.search(blk)
             if m2:
-                return m2.group(0), {"snippet": blk[:180], "page": page_num}
+                return m2.group(0), {"snippet": blk[:180], "page": page.page_num}
 
     return None, None
 
-def _find_amount(text, labels, page):
-    v, ev = _find_after_label(text, labels, AMOUNT_TOKEN, page)
-    return (parse_amount(v) if v else None), ev
+def _page_amounts(page: Page):
+    """(starts, amounts): every amount on the page, from one grammar pass."""
+    def compute():
+        amounts = scan_amounts(page.text)
+        return [a.start for a in amounts], amounts
+    return page.cached("amounts", compute)
+
+def _find_amount(page: Page, labels, hits=None):
+    text = page.text
+    hits = _label_hits(page, labels, hits)
+    starts, amounts = _page_amounts(page)
+    for lbl in labels:
+        idx = hits.get(lbl.lower(), -1)
+        if idx == -1:
+            continue
+
+        # primary: the first amount inside the window after the label
+        j = idx + len(lbl)
+        k = bisect_left(starts, j)
+        if k < len(amounts) and amounts[k].end <= j + SEARCH_WINDOW_CHARS:
+            return amounts[k].value, {"snippet": _window_after_label(text, lbl, idx)[:180], "page": page.page_num}
 
-def _find_date(text, labels, page):
+        # secondary: also look in the next 2 "lines"
+        lines = page.lines_after(idx, idx + SEARCH_WINDOW_CHARS)
+        if lines:
+            blk = " ".join(lines)
+            a = match_amount(blk)
+            if a is not None:
+                return a.value, {"snippet": blk[:180], "page": page.page_num}
+
+    return None, None
+
+def _find_date(page: Page, labels, hits=None):
     # handle SBI: NO PAYMENT REQUIRED/NO PAYMENT DUE
-    if re.search(r"\bNO PAYMENT (REQUIRED|DUE)\b", text, re.IGNORECASE):
-        return "NO PAYMENT REQUIRED", {"snippet": "NO PAYMENT REQUIRED", "page": page}
-    v, ev = _find_after_label(
-        text, labels,
-        r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|[A-Za-z]{3,}\s+\d{1,2},?\s+\d{4}|\d{4}-\d{2}-\d{2}",
-        page,
-    )
+    if page.cached(_NO_PAYMENT_RE, lambda: _NO_PAYMENT_RE.search(page.text) is not None):
+        return "NO PAYMENT REQUIRED", {"snippet": "NO PAYMENT REQUIRED", "page": page.page_num}
+    v, ev = _find_after_label(page, labels, _DATE_RE, hits)
     return (parse_date(v) if v else None), ev
 
 def _bad_context(snippet_lower: str) -> bool:
@@ -58,101 +105,49 @@ def _bad_context(snippet_lower: str) -> bool:
 
 # --------------------------- helpers (word-layout) ---------------------------
 
-_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*"
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]{0,6}"
 _DATE_WORD_RE = re.compile(
     rf"(?:\d{{1,2}}[/-]\d{{1,2}}[/-]\d{{2,4}}|{_MONTH}\s+\d{{1,2}},?\s+\d{{4}}|\d{{4}}-\d{{2}}-\d{{2}})",
     re.IGNORECASE,
 )
 
-def _tokens_near_label(words: List[Dict], label_tokens: List[str], max_dx: float = 9999, max_dy: float = 150) -> Optional[Tuple[float, float, float, float]]:
+def _tokens_near_label(index: WordIndex, label_tokens: List[str], max_dy: float = 150) -> Optional[Tuple[float, float, float, float]]:
     """
     Find a rough bbox around the label (sequence of tokens).
     """
-    if not words:
+    if not len(index):
         return None
+    return index.label_bbox(label_tokens, max_dy)
 
-    norm = []
-    for w in words:
-        txt = str(w.get("text", "")).strip()
-        if not txt:
-            continue
-        x0 = float(w.get("x0", w.get("left", 0)))
-        y0 = float(w.get("y0", w.get("top", 0)))
-        x1 = float(w.get("x1", x0 + float(w.get("width", 0))))
-        y1 = float(w.get("y1", y0 + float(w.get("height", 0))))
-        norm.append((x0, y0, x1, y1, txt.lower()))
-
-    toks = [t.lower() for t in label_tokens if t]
-    if not toks:
-        return None
-
-    for i in range(len(norm)):
-        x0, y0, x1, y1, t = norm[i]
-        if toks[0] not in t:
-            continue
-        found = [norm[i]]
-        tok_idx = 1
-        j = i + 1
-        while j < len(norm) and tok_idx < len(toks):
-            xx0, yy0, xx1, yy1, tt = norm[j]
-            if abs(yy0 - y0) > max_dy:
-                break
-            if toks[tok_idx] in tt:
-                found.append(norm[j])
-                tok_idx += 1
-            j += 1
-        if tok_idx == len(toks):
-            minx = min(a[0] for a in found)
-            miny = min(a[1] for a in found)
-            maxx = max(a[2] for a in found)
-            maxy = max(a[3] for a in found)
-            return (minx, miny, maxx, maxy)
-
-    return None
-
-def _date_near_bbox(words: List[Dict], bbox: Tuple[float, float, float, float], dy_down: float = 200, dx_pad: float = 100) -> Optional[str]:
+def _date_near_bbox(index: WordIndex, bbox: Tuple[float, float, float, float], dy_down: float = 200, dx_pad: float = 100) -> Optional[str]:
     """
     Given a bbox (label area), find a date-like token cluster just below it.
     """
-    if not words or not bbox:
+    if not len(index) or not bbox:
         return None
     minx, miny, maxx, maxy = bbox
-    target_minx = minx - dx_pad
-    target_maxx = maxx + dx_pad
-    target_miny = maxy - 5
-    target_maxy = maxy + dy_down
-
-    region = []
-    for w in words:
-        x0 = float(w.get("x0", w.get("left", 0)))
-        y0 = float(w.get("y0", w.get("top", 0)))
-        x1 = float(w.get("x1", x0 + float(w.get("width", 0))))
-        y1 = float(w.get("y1", y0 + float(w.get("height", 0))))
-        if (x1 >= target_minx and x0 <= target_maxx and
-            y1 >= target_miny and y0 <= target_maxy):
-            region.append((y0, x0, str(w.get("text",""))))
-
+    region = index.words_in_box(minx - dx_pad, maxy - 5, maxx + dx_pad, maxy + dy_down)
     if not region:
         return None
 
-    region.sort()
     line = " ".join(tok for (_, _, tok) in region)
     m = _DATE_WORD_RE.search(line)
     return m.group(0) if m else None
 
-def _find_date_word_layout(page_words: List[Dict], labels: List[str]) -> Optional[str]:
+def _find_date_word_layout(page: Page, labels: List[str]) -> Optional[str]:
     """
     Word-layout fallback: use proximity of date tokens below the label.
     """
-    if not page_words:
+    if not page.n_words:
         return None
+    index = page.word_index()  # built once per page, shared by every label and both passes
     
     for raw_lbl in labels:
         toks = [t for t in re.split(r"\W+", raw_lbl) if len(t) >= 3]
-        bbox = _tokens_near_label(page_words, toks)
+        bbox = _tokens_near_label(index, toks)
         if not bbox:
             continue
-        dt = _date_near_bbox(page_words, bbox)
+        dt = _date_near_bbox(index, bbox)
         if dt:
             return parse_date(dt)
     
@@ -160,24 +155,36 @@ def _find_date_word_layout(page_words: List[Dict], labels: List[str]) -> Optiona
     for raw_lbl in labels:
         if "payment" in raw_lbl.lower() and "due" in raw_lbl.lower():
             toks = ["payment", "due"]
-            bbox = _tokens_near_label(page_words, toks, max_dy=200)
+            bbox = _tokens_near_label(index, toks, max_dy=200)
             if bbox:
-                dt = _date_near_bbox(page_words, bbox, dy_down=250)
+                dt = _date_near_bbox(index, bbox, dy_down=250)
                 if dt:
                     return parse_date(dt)
     
     return None
 
-def _find_date_icici_text_only(text: str, labels: List[str], page_num: int):
+def _page_dates(page: Page) -> List[Tuple[int, str]]:
+    """(position, parsed date) of every date-like token on the page that parses, computed once."""
+    def compute():
+        out = []
+        for s, e in zip(*page.spans(_DATE_WORD_RE)):
+            parsed = parse_date(page.text[s:e])
+            if parsed:
+                out.append((s, parsed))
+        return out
+    return page.cached("dates", compute)
+
+def _find_date_icici_text_only(page: Page, labels: List[str], hits=None):
     """
     ICICI-specific: Find ALL dates, pick the one closest to "PAYMENT DUE DATE" label.
     """
-    low = text.lower()
+    text = page.text; page_num = page.page_num
+    hits = _label_hits(page, labels, hits)
     
     # Find the position of the "payment due date" label
     label_pos = -1
     for lbl in labels:
-        idx = low.find(lbl.lower())
+        idx = hits.get(lbl.lower(), -1)
         if idx != -1:
             label_pos = idx
             break
@@ -186,14 +193,7 @@ def _find_date_icici_text_only(text: str, labels: List[str], page_num: int):
         return None, None
     
     # Find ALL dates in the entire text
-    all_dates = []
-    for match in _DATE_WORD_RE.finditer(text):
-        date_str = match.group(0)
-        date_pos = match.start()
-        parsed = parse_date(date_str)
-        if parsed:
-            distance = abs(date_pos - label_pos)
-            all_dates.append((distance, date_pos, parsed, date_str))
+    all_dates = [(abs(date_pos - label_pos), date_pos, parsed) for date_pos, parsed in _page_dates(page)]
     
     if not all_dates:
         return None, None
@@ -214,83 +214,94 @@ def _find_date_icici_text_only(text: str, labels: List[str], page_num: int):
     snippet = text[max(0, best[1]-50):best[1]+50]
     return best[2], {"snippet": snippet, "page": page_num}
 
-def _find_date_icici(text: str, page_words: List[Dict], labels: List[str], page_num: int):
+def _find_date_icici(page: Page, labels: List[str], hits=None):
     """
     ICICI-specific date finder with multiple fallback strategies.
     """
+    text = page.text; page_num = page.page_num
     # Strategy 1: Word layout (if word coordinates available)
-    if page_words:
-        date_val = _find_date_word_layout(page_words, labels)
+    if page.n_words:
+        date_val = _find_date_word_layout(page, labels)
         if date_val:
             return date_val, {"snippet": "found via word-layout proximity", "page": page_num}
     
     # Strategy 2: Aggressive text-only search
-    d, ev = _find_date_icici_text_only(text, labels, page_num)
+    hits = _label_hits(page, labels, hits)
+    d, ev = _find_date_icici_text_only(page, labels, hits)
     if d:
         return d, ev
     
     # Strategy 3: Extended text window search
-    low = text.lower()
     for lbl in labels:
-        lbl_low = lbl.lower()
-        idx = low.find(lbl_low)
+        idx = hits.get(lbl.lower(), -1)
         if idx == -1:
             continue
         
-        win = text[idx:idx + 500]
-        m = _DATE_WORD_RE.search(win)
-        if m:
-            parsed = parse_date(m.group(0))
+        v = page.search(_DATE_WORD_RE, idx, idx + 500)
+        if v:
+            parsed = parse_date(v)
             if parsed:
-                return parsed, {"snippet": win[:180], "page": page_num}
+                return parsed, {"snippet": text[idx:idx + 180], "page": page_num}
     
     # Strategy 4: Search the ENTIRE page for any date (last resort)
-    m = _DATE_WORD_RE.search(text)
-    if m:
-        parsed = parse_date(m.group(0))
+    starts, ends = page.spans(_DATE_WORD_RE)
+    if starts:
+        parsed = parse_date(text[starts[0]:ends[0]])
         if parsed:
-            return parsed, {"snippet": text[max(0, m.start()-50):m.start()+100], "page": page_num}
+            return parsed, {"snippet": text[max(0, starts[0]-50):starts[0]+100], "page": page_num}
     
     return None, None
 
 # --------------------------- card last digits ---------------------------
 
-def _find_card_tail(pages, card_labels):
-    """
-    Search every page for a card context label, then extract last4 (or last2) near it.
-    """
-    best = None; best_len = 0; evidence = {}
+def _find_card_tail_labeled(p, card_labels, hits=None):
+    """Look for a card context label on one page and extract last4 (or last2) near it."""
+    text = p.text
+    hits = _label_hits(p, card_labels, hits)
+    for lbl in card_labels:
+        idx = hits.get(lbl.lower(), -1)
+        if idx == -1: continue
+        win = text[max(0, idx-30): idx + SEARCH_WINDOW_CHARS]
+        if _bad_context(win.lower()):
+            continue
+        digits, n = last_tail(win)
+        if digits:
+            return digits, n, {"snippet": win[:180], "page": p.page_num}
+    return None, 0, {}
+
+_CARD_TOKEN_RE = re.compile(r"\d{4}\s\d{4}\s\d{4}\s\d{4}|(?<![*X])(?:\*|X){2,}\s?\d{2,4}|XXXX\s?\d{2,4}", re.IGNORECASE)
+
+def _find_card_tail_unlabeled(pages):
+    """Fallback: any masked / 16-digit number that is not in a negative context."""
     for p in pages:
-        text = p["text"]; low = text.lower()
-        for lbl in card_labels:
-            idx = low.find(lbl.lower())
-            if idx == -1: continue
-            win = text[max(0, idx-30): idx + SEARCH_WINDOW_CHARS]
+        for m in _CARD_TOKEN_RE.finditer(p.text):
+            win = p.text[max(0, m.start()-40): m.end()+20]
             if _bad_context(win.lower()):
                 continue
             digits, n = last_tail(win)
             if digits:
-                best, best_len = digits, n
-                evidence = {"snippet": win[:180], "page": p["page_num"]}
-                break
-        if best: break
-
-    if not best:
-        for p in pages:
-            for m in re.finditer(r"(?:\d{4}\s\d{4}\s\d{4}\s\d{4}|(?:\*|X){2,}\s?\d{2,4}|XXXX\s?\d{2,4})", p["text"], flags=re.IGNORECASE):
-                win = p["text"][max(0, m.start()-40): m.end()+20]
-                if _bad_context(win.lower()):
-                    continue
-                digits, n = last_tail(win)
-                if digits:
-                    return digits, n, {"snippet": win[:180], "page": p["page_num"]}
-    return best, best_len, evidence
+                return digits, n, {"snippet": win[:180], "page": p.page_num}
+    return None, 0, {}
 
 # --------------------------- main field extractor ---------------------------
 
+# the fields every record carries (bench and the fingerprint table check them too)
+FIELDS = ("card_last", "total_amount_due", "minimum_amount_due", "payment_due_date", "available_credit_limit")
+
+def _fields_done(rec) -> bool:
+    conf = rec["confidence"]
+    return all(rec[k] is not None and conf.get(k, 0.0) >= EARLY_STOP_CONFIDENCE for k in FIELDS)
+
+def _set_card(rec, tail, n, ev):
+    rec["card_last"] = tail
+    rec["card_mask"] = ("XXXX " + tail) if n == 4 else ("XXXX XX" + tail)
+    rec["confidence"]["card_last"] = 0.95 if n == 4 else 0.85
+    rec["evidence"]["card_last"] = ev or {}
+
 def _extract_fields(pages, labels, use_icici_date=False):
     """
-    Main extraction logic.
+    Main extraction logic. `pages` may be a lazy iterator: pages are pulled one
+    at a time and no further pages are requested once every field is found.
     """
     rec = {
         "card_last": None, "card_mask": None,
@@ -298,60 +309,82 @@ def _extract_fields(pages, labels, use_icici_date=False):
         "payment_due_date": None, "available_credit_limit": None,
         "confidence": {}, "evidence": {}
     }
-
-    tail, n, ev = _find_card_tail(pages, labels.get("card") or GENERIC_LABELS["card"])
-    if tail:
-        rec["card_last"] = tail
-        rec["card_mask"] = ("XXXX " + tail) if n == 4 else ("XXXX XX" + tail)
-        rec["confidence"]["card_last"] = 0.95 if n == 4 else 0.85
-        rec["evidence"]["card_last"] = ev or {}
+    card_labels = labels.get("card") or GENERIC_LABELS["card"]
+    total_labels = labels.get("total") or GENERIC_LABELS["total"]
+    minimum_labels = labels.get("minimum") or GENERIC_LABELS["minimum"]
+    date_labels = labels.get("due_date") or GENERIC_LABELS["due_date"]
+    avail_labels = labels.get("avail_limit") or GENERIC_LABELS["avail_limit"]
+    # every label of every field, found in one pass per page
+    all_labels = (tuple(card_labels) + tuple(total_labels) + tuple(minimum_labels)
+                  + tuple(date_labels) + tuple(avail_labels))
+    scanner = scanner_for(all_labels)
+    fuzzy = None
+    seen = []
 
     for p in pages:
-        t = p["text"]; pn = p["page_num"]; words = p.get("words") or []
+        seen.append(p)
+        pn = p.page_num
+        hits = scanner.first_hits(p.lower)
+        if p.ocr:
+            # OCR mangles labels: look for the missing ones within a few edits
+            if fuzzy is None:
+                fuzzy = fuzzy_scanner_for(all_labels, OCR_LABEL_MAX_ERRORS, OCR_LABEL_CHARS_PER_ERROR)
+            hits.update(fuzzy.first_hits(p.lower, skip=hits))
+
+        if rec["card_last"] is None:
+            tail, n, ev = _find_card_tail_labeled(p, card_labels, hits)
+            if tail:
+                _set_card(rec, tail, n, ev)
 
         if rec["total_amount_due"] is None:
-            v, ev = _find_amount(t, labels.get("total") or GENERIC_LABELS["total"], pn)
+            v, ev = _find_amount(p, total_labels, hits)
             if v is not None:
                 rec["total_amount_due"] = v
                 rec["confidence"]["total_amount_due"] = 0.9
                 rec["evidence"]["total_amount_due"] = ev or {}
 
         if rec["minimum_amount_due"] is None:
-            v, ev = _find_amount(t, labels.get("minimum") or GENERIC_LABELS["minimum"], pn)
+            v, ev = _find_amount(p, minimum_labels, hits)
             if v is not None:
                 rec["minimum_amount_due"] = v
                 rec["confidence"]["minimum_amount_due"] = 0.9
                 rec["evidence"]["minimum_amount_due"] = ev or {}
 
         if rec["payment_due_date"] is None:
-            date_labels = labels.get("due_date") or GENERIC_LABELS["due_date"]
-            
             if use_icici_date:
-                d, ev = _find_date_icici(t, words, date_labels, pn)
+                d, ev = _find_date_icici(p, date_labels, hits)
                 if d is not None:
                     rec["payment_due_date"] = d
                     rec["confidence"]["payment_due_date"] = 0.92
                     rec["evidence"]["payment_due_date"] = ev or {}
             else:
-                d, ev = _find_date(t, date_labels, pn)
+                d, ev = _find_date(p, date_labels, hits)
                 if d is not None:
                     rec["payment_due_date"] = d
                     rec["confidence"]["payment_due_date"] = 0.9
                     rec["evidence"]["payment_due_date"] = ev or {}
                 else:
-                    d2 = _find_date_word_layout(words, date_labels)
+                    d2 = _find_date_word_layout(p, date_labels)
                     if d2:
                         rec["payment_due_date"] = d2
                         rec["confidence"]["payment_due_date"] = 0.92
                         rec["evidence"]["payment_due_date"] = {"snippet": "date found via word-layout proximity", "page": pn}
 
         if rec["available_credit_limit"] is None:
-            v, ev = _find_amount(t, labels.get("avail_limit") or GENERIC_LABELS["avail_limit"], pn)
+            v, ev = _find_amount(p, avail_labels, hits)
             if v is not None:
                 rec["available_credit_limit"] = v
                 rec["confidence"]["available_credit_limit"] = 0.9
                 rec["evidence"]["available_credit_limit"] = ev or {}
 
+        if _fields_done(rec):
+            break
+
+    if rec["card_last"] is None:
+        tail, n, ev = _find_card_tail_unlabeled(seen)
+        if tail:
+            _set_card(rec, tail, n, ev)
+
     return rec
 
 # --------------------------- public extractors ---------------------------
@@ -0,0 +1,131 @@
+# fingerprint.py
+# Statement generators leave stable traces: /Producer, /Creator, page-1 font names and page
+# size. These are read from the pikepdf document before any text is extracted. A table maps
+# fingerprints from successful parses to the issuer and the pages the fields were found on.
+# A known fingerprint skips issuer detection and extracts those pages first.
+
+import json
+import os
+import re
+import tempfile
+import hashlib
+from config import FINGERPRINT_TABLE_PATH, FINGERPRINT_MIN_SEEN
+from extractors import FIELDS
+
+_SUBSET_PREFIX = re.compile(r"^[A-Z]{6}\+")  # embedded font subsets: "ABCDEF+Arial"
+_VERSION = re.compile(r"\d+(?:[.\-_]\d+)*")  # generator versions move between releases
+
+def _norm(value) -> str:
+    return _VERSION.sub("#", str(value)).strip().lower() if value is not None else ""
+
+def pdf_fingerprint(pdf) -> str | None:
+    """Hash of generator strings, page-1 fonts and page size; None when nothing generator-specific is present."""
+    try:
+        info = pdf.docinfo
+        producer, creator = _norm(info.get("/Producer")), _norm(info.get("/Creator"))
+        page = pdf.pages[0]
+        x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+        fonts = set()
+        font_dict = (page.obj.get("/Resources") or {}).get("/Font") or {}
+        for key in font_dict.keys():
+            base = font_dict[key].get("/BaseFont")
+            if base is not None:
+                fonts.add(_SUBSET_PREFIX.sub("", str(base).lstrip("/")))
+    except Exception:
+        return None
+    if not (producer or creator or fonts):
+        return None
+    blob = json.dumps([producer, creator, sorted(fonts), round(x1 - x0), round(y1 - y0)])
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+class FingerprintTable:
+    """
+    fingerprint -> {"issuer", "field_pages", "seen"}. In memory, and persisted as JSON
+    when a path is given. A plan is only served after FINGERPRINT_MIN_SEEN complete
+    parses agreed on the issuer; a fingerprint seen with two issuers is never served.
+    """
+
+    def __init__(self, path: str | None = None, min_seen: int = FINGERPRINT_MIN_SEEN):
+        self.path = path
+        self.min_seen = min_seen
+        self.stats = {"hits": 0, "misses": 0, "learned": 0}
+        self._plans = {}
+        self._generation = None  # hash of the served plans, recomputed after they change
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    self._plans = json.load(fh)
+            except (OSError, ValueError):
+                self._plans = {}
+
+    def _served(self, entry: dict | None) -> tuple | None:
+        if entry and entry["issuer"] and entry["seen"] >= self.min_seen:
+            return entry["issuer"], entry["field_pages"]
+        return None
+
+    @property
+    def generation(self) -> str:
+        """
+        Identifies the plans this table serves: it changes whenever plan() could answer
+        differently, not on every learn(). Derived from the content, so it is the same for
+        the same persisted table in another process.
+        """
+        if self._generation is None:
+            served = sorted([fp, *s] for fp, e in self._plans.items() if (s := self._served(e)))
+            self._generation = hashlib.blake2b(json.dumps(served).encode("utf-8"), digest_size=8).hexdigest()
+        return self._generation
+
+    def plan(self, fp: str | None) -> dict | None:
+        entry = self._plans.get(fp) if fp else None
+        if self._served(entry):
+            self.stats["hits"] += 1
+            return entry
+        self.stats["misses"] += 1
+        return None
+
+    def learn(self, fp: str | None, result: dict):
+        """Record a parse result; incomplete results reset the fingerprint's trust."""
+        if not fp or not result.get("success"):
+            return
+        rec = (result.get("records") or [{}])[0]
+        entry = self._plans.get(fp)
+        before = self._served(entry)
+        if any(rec.get(k) is None for k in FIELDS) or result.get("issuer") in (None, "UNKNOWN"):
+            if entry:
+                entry["seen"] = 0
+                self._changed(before, entry)
+            return
+        pages = sorted({ev["page"] for ev in rec.get("evidence", {}).values() if ev and ev.get("page")})
+        if entry is None:
+            entry = self._plans[fp] = {"issuer": result["issuer"], "field_pages": pages, "seen": 0}
+        elif entry["issuer"] != result["issuer"]:
+            entry["issuer"] = None
+        entry["field_pages"] = pages
+        entry["seen"] += 1
+        self.stats["learned"] += 1
+        self._changed(before, entry)
+
+    def _changed(self, before: tuple | None, entry: dict):
+        if self._served(entry) != before:
+            self._generation = None
+        self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(self._plans, fh)
+            os.replace(tmp, self.path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def clear(self):
+        self._plans.clear()
+        self._generation = None
+        self._save()
+
+FINGERPRINTS = FingerprintTable(FINGERPRINT_TABLE_PATH)
@@ -0,0 +1,64 @@
+# issuer.py
+# Issuer detection from keyword evidence in the PDF metadata and the page text.
+# All keywords of all issuers are found in one scan per page (labelscan). A keyword counts
+# fully in the metadata or the page-1 header, and less deeper in the page or on later
+# pages. Confidence is the gap to the runner-up issuer: a page naming two banks scores low.
+
+from typing import Iterable
+from labelscan import scanner_for
+from config import ISSUERS, ISSUER_HEADER_CHARS
+
+DEEP_HIT_WEIGHT = 0.6  # a keyword past the header (e.g. in the fine print)
+
+class IssuerDetector:
+    """Feed metadata and pages in document order; result() is valid after every step."""
+
+    def __init__(self, issuers: dict | None = None):
+        self.issuers = ISSUERS if issuers is None else issuers
+        self._owners = {}  # keyword -> issuers listing it
+        for name, cfg in self.issuers.items():
+            for kw in cfg["keywords"]:
+                self._owners.setdefault(kw.lower(), []).append(name)
+        self._scanner = scanner_for(tuple(self._owners))
+        self._weight = {}  # keyword -> strongest evidence seen so far
+        self.pages_seen = 0
+
+    def _add(self, text: str, header_w: float, deep_w: float):
+        for kw, idx in self._scanner.first_hits(text.lower()).items():
+            w = header_w if idx < ISSUER_HEADER_CHARS else deep_w
+            if w > self._weight.get(kw, 0.0):
+                self._weight[kw] = w
+
+    def add_metadata(self, text: str):
+        if text:
+            self._add(text, 1.0, 1.0)
+
+    def add_page(self, text: str):
+        page_w = 1.0 / (1 + self.pages_seen)
+        self.pages_seen += 1
+        self._add(text, page_w, DEEP_HIT_WEIGHT * page_w)
+
+    def scores(self) -> dict[str, float]:
+        scores = dict.fromkeys(self.issuers, 0.0)
+        for kw, w in self._weight.items():
+            for name in self._owners[kw]:
+                scores[name] += w
+        return scores
+
+    def result(self) -> tuple[str, float]:
+        """(issuer, confidence in [0, 1]); ("UNKNOWN", 0.0) without any keyword hit."""
+        scores = self.scores()
+        ranked = sorted(scores, key=scores.get, reverse=True)  # stable: ties keep ISSUERS order
+        top = scores[ranked[0]] if ranked else 0.0
+        if top <= 0:
+            return "UNKNOWN", 0.0
+        runner = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        return ranked[0], round((top - runner) / top * min(1.0, top), 3)
+
+def detect_issuer(pages: Iterable, metadata: str = "") -> tuple[str, float]:
+    """One-shot detection over already extracted pages."""
+    det = IssuerDetector()
+    det.add_metadata(metadata)
+    for p in pages:
+        det.add_page(p.text)
+    return det.result()
@@ -0,0 +1,143 @@
+# labelscan.py
+# One pass over a page for every label of every field.
+# All labels are compiled into a single trie-shaped regex, so the scan runs inside the C
+# regex engine (a pure-Python Aho-Corasick loop would be slower than the str.find calls
+# it replaces). Branches of the trie differ in their next character, so the match at a
+# position is always the longest label there; the shorter labels matching at the same
+# position are exactly its prefixes, which are precomputed.
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+def _trie_regex(words: Iterable[str]) -> str:
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def render(node) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body  # greedy: the longer label wins
+
+    return render(trie)
+
+class LabelScanner:
+    """first_hits(low) == {lbl: low.find(lbl)} for every label found, in one regex pass."""
+
+    def __init__(self, labels: Iterable[str]):
+        self.labels = sorted({l.lower() for l in labels if l})
+        self._prefixes = {l: [p for p in self.labels if p != l and l.startswith(p)] for l in self.labels}
+        self._re = re.compile(_trie_regex(self.labels)) if self.labels else None
+
+    def first_hits(self, low: str) -> dict[str, int]:
+        hits = {}
+        if self._re is None:
+            return hits
+        m = self._re.search(low)
+        while m:
+            start = m.start()
+            lbl = m.group(0)
+            hits.setdefault(lbl, start)
+            for p in self._prefixes[lbl]:
+                hits.setdefault(p, start)
+            if len(hits) == len(self.labels):
+                break
+            m = self._re.search(low, start + 1)
+        return hits
+
+@lru_cache(maxsize=64)
+def scanner_for(labels: tuple[str, ...]) -> LabelScanner:
+    """Compiled scanner per label set (keyed by content, so edited label lists get a new one)."""
+    return LabelScanner(labels)
+
+class FuzzyLabelScanner:
+    """
+    first_hits for OCR text, where labels come out with a letter or two wrong: a label is
+    found where some substring is within errors(label) edits of it. All labels run in one
+    pass of the Wu-Manber bit-parallel Shift-And: labels are concatenated into one integer,
+    one bit per label char, and level d holds the label prefixes matched with <= d edits.
+    A hit is reported at its best-scoring end, as end - len(label) + 1, so the usual
+    `idx + len(label)` still points just past the label text.
+    """
+
+    def __init__(self, labels: Iterable[str], max_errors: int, chars_per_error: int):
+        budget = lambda l: min(max_errors, len(l) // chars_per_error)
+        self.labels = sorted({l.lower() for l in labels if l and budget(l.lower()) > 0})
+        self.k = max((budget(l) for l in self.labels), default=0)
+        self._masks = {}  # char -> bits of the label positions holding it
+        self._start = 0  # first position of every label
+        self._init = [0] * (self.k + 1)  # level d: prefixes of <= d chars match by deletion anywhere
+        self._final = {}  # label -> (bit of its last position, error budget)
+        pos = 0
+        for l in self.labels:
+            self._start |= 1 << pos
+            for i, ch in enumerate(l):
+                self._masks[ch] = self._masks.get(ch, 0) | (1 << (pos + i))
+                for d in range(i + 1, self.k + 1):
+                    self._init[d] |= 1 << (pos + i)
+            pos += len(l)
+            self._final[l] = (1 << (pos - 1), budget(l))
+        self._full = (1 << pos) - 1
+
+    def first_hits(self, low: str, skip=()) -> dict[str, int]:
+        want = {l: fb for l, fb in self._final.items() if l not in skip}
+        hits = {}
+        if not want:
+            return hits
+        k, masks, start, init, full = self.k, self._masks, self._start, self._init, self._full
+        # bits checked per level: the last position of every wanted label with that budget
+        watch = [0] * (k + 1)
+        for bit, budget in want.values():
+            watch[budget] |= bit
+        by_bit = {bit: l for l, (bit, _) in want.items()}
+        pending = {}  # label -> [end, errors]: a hit may still improve within `errors` chars
+        r = list(init)
+        for t, ch in enumerate(low):
+            b = masks.get(ch, 0)
+            prev_old = r[0]
+            r[0] = ((prev_old << 1) | start) & b
+            for d in range(1, k + 1):
+                old = r[d]
+                r[d] = ((((old << 1) | start) & b) | prev_old
+                        | ((prev_old | r[d - 1]) << 1) | init[d]) & full
+                prev_old = old
+            for l, p in list(pending.items()):
+                bit = want[l][0]
+                for d in range(p[1]):
+                    if r[d] & bit:
+                        p[0], p[1] = t, d
+                        break
+                if t - p[0] >= p[1]:
+                    hits[l] = max(0, p[0] - len(l) + 1)
+                    del pending[l]
+            found = 0
+            for d in range(k + 1):
+                found |= r[d] & watch[d]
+            while found:
+                bit = found & -found
+                found ^= bit
+                l = by_bit[bit]
+                errors = next(d for d in range(k + 1) if r[d] & bit)
+                watch[want[l][1]] &= ~bit
+                if errors == 0:
+                    hits[l] = max(0, t - len(l) + 1)
+                else:
+                    pending[l] = [t, errors]
+            if not pending and len(hits) == len(want):
+                break
+        for l, (end, _) in pending.items():
+            hits[l] = max(0, end - len(l) + 1)
+        return hits
+
+@lru_cache(maxsize=16)
+def fuzzy_scanner_for(labels: tuple[str, ...], max_errors: int, chars_per_error: int) -> FuzzyLabelScanner:
+    return FuzzyLabelScanner(labels, max_errors, chars_per_error)
@@ -0,0 +1,99 @@
+# layout.py
+# Word-box index for the word-layout fallbacks, built once per page. It keeps normalized
+# boxes, a token -> word positions map (each token filled on first use, from the distinct
+# word texts), and a top-sorted order so "words in this box" is a bisect instead of a scan.
+# Every query returns the same result as a scan of the word list.
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+def word_box(w: dict) -> tuple[float, float, float, float]:
+    """(x0, top, x1, bottom) of a pdfplumber word (x0/top/x1/bottom) or a Tesseract word (left/top/width/height)."""
+    x0 = float(w.get("x0", w.get("left", 0)))
+    y0 = float(w.get("y0", w.get("top", 0)))
+    x1 = float(w.get("x1", x0 + float(w.get("width", 0))))
+    y1 = float(w.get("y1", w.get("bottom", y0 + float(w.get("height", 0)))))
+    return x0, y0, x1, y1
+
+class WordIndex:
+    """Queries over per-word coordinate arrays (shared with the Page, not copied)."""
+
+    def __init__(self, x0, y0, x1, y1, texts: list[str]):
+        self.x0, self.y0, self.x1, self.y1, self.texts = x0, y0, x1, y1, texts
+        n = len(texts)
+        # label matching sees only non-blank words, lowercased; "pos" below indexes this list
+        self._lab = [i for i in range(n) if texts[i].strip()]
+        self._by_text = {}
+        for pos, i in enumerate(self._lab):
+            self._by_text.setdefault(texts[i].strip().lower(), []).append(pos)
+        self._lab_tops = [y0[i] for i in self._lab]
+        self._token_pos = {}
+        self._by_top = None  # box queries: word order by top, built on first use
+
+    @classmethod
+    def from_words(cls, words: list[dict]) -> "WordIndex":
+        x0, y0, x1, y1 = array("d"), array("d"), array("d"), array("d")
+        texts = []
+        for w in words:
+            a, b, c, d = word_box(w)
+            x0.append(a); y0.append(b); x1.append(c); y1.append(d)
+            texts.append(str(w.get("text", "")))
+        return cls(x0, y0, x1, y1, texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _positions(self, tok: str) -> list[int]:
+        """Sorted positions of the words containing tok (substring match, like `tok in text`)."""
+        pos = self._token_pos.get(tok)
+        if pos is None:
+            pos = sorted(p for text, ps in self._by_text.items() if tok in text for p in ps)
+            self._token_pos[tok] = pos
+        return pos
+
+    def label_bbox(self, tokens: list[str], max_dy: float = 150) -> tuple[float, float, float, float] | None:
+        """
+        Bbox of the first word containing tokens[0] followed, in reading order and within
+        max_dy of its top, by words containing the remaining tokens in turn.
+        """
+        toks = [t.lower() for t in tokens if t]
+        if not toks:
+            return None
+        tops = self._lab_tops
+        for start in self._positions(toks[0]):
+            y = tops[start]
+            found = [start]
+            banded = start  # every position up to here has its top within max_dy of y
+            for tok in toks[1:]:
+                ps = self._positions(tok)
+                k = bisect_right(ps, found[-1])
+                if k == len(ps):
+                    break
+                nxt = ps[k]
+                while banded < nxt and abs(tops[banded + 1] - y) <= max_dy:
+                    banded += 1
+                if banded < nxt:
+                    break
+                found.append(nxt)
+            if len(found) == len(toks):
+                idx = [self._lab[p] for p in found]
+                return (min(self.x0[i] for i in idx), min(self.y0[i] for i in idx),
+                        max(self.x1[i] for i in idx), max(self.y1[i] for i in idx))
+        return None
+
+    def words_in_box(self, x0: float, top: float, x1: float, bottom: float) -> list[tuple[float, float, str]]:
+        """(top, x0, text) of every word overlapping the box, sorted top-to-bottom, left-to-right."""
+        if self._by_top is None:
+            self._by_top = sorted(range(len(self.texts)), key=self.y0.__getitem__)
+            self._tops = array("d", (self.y0[i] for i in self._by_top))
+            # the tallest word bounds how far above the box a top can be and still overlap it
+            self._max_h = max((self.y1[i] - self.y0[i] for i in range(len(self.texts))), default=0.0)
+            self._max_h = max(self._max_h, 0.0)
+        lo = bisect_left(self._tops, top - self._max_h - 1.0)
+        hi = bisect_right(self._tops, bottom)
+        out = []
+        for i in self._by_top[lo:hi]:
+            if self.x1[i] >= x0 and self.x0[i] <= x1 and self.y1[i] >= top and self.y0[i] <= bottom:
+                out.append((self.y0[i], self.x0[i], self.texts[i]))
+        out.sort()
+        return out
@@ -0,0 +1,136 @@
+# page.py
+# One extracted page: text plus word geometry in flat float arrays (one entry per word).
+# pdfplumber words (x0/top/x1/bottom) and Tesseract words (left/top/width/height) are
+# normalized once, on construction; nothing downstream looks at raw word dicts.
+# Derived text data (lowercase text, line breaks, regex token positions) is computed on
+# first use and shared by every field the extractors look for. Word boxes can be deferred
+# to a loader, run only when a layout fallback first asks for them.
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from layout import WordIndex, word_box
+
+_LINE_BREAKS = re.compile(r"[\r\n]+")
+
+class Page:
+    __slots__ = ("page_num", "text", "raw_text", "ocr", "region",
+                 "x0", "top", "x1", "bottom", "word_texts", "_index", "_lower", "_memo", "_loader")
+
+    def __init__(self, page_num: int, text: str, raw_text: str = "", words=(),
+                 ocr: bool = False, region: bool = False, loader=None):
+        self.page_num = page_num
+        self.ocr = ocr
+        self.region = region
+        self.set_text(text, raw_text)
+        self.set_words(words)
+        self._loader = loader  # () -> word dicts, called on first geometry access
+
+    def set_text(self, text: str, raw_text: str = ""):
+        self.text = text
+        self.raw_text = raw_text
+        self._lower = None
+        self._memo = {}
+
+    def set_words(self, words):
+        self.x0, self.top, self.x1, self.bottom = array("d"), array("d"), array("d"), array("d")
+        self.word_texts = []
+        for w in words or ():
+            x0, top, x1, bottom = word_box(w)
+            self.x0.append(x0); self.top.append(top); self.x1.append(x1); self.bottom.append(bottom)
+            self.word_texts.append(str(w.get("text", "")))
+        self._index = None
+        self._loader = None
+
+    def _load_words(self):
+        if self._loader is not None:
+            self.set_words(self._loader())
+
+    @property
+    def words_loaded(self) -> bool:
+        return self._loader is None
+
+    @property
+    def n_words(self) -> int:
+        self._load_words()
+        return len(self.word_texts)
+
+    @property
+    def words(self) -> list[dict]:
+        """Word boxes as dicts (x0/top/x1/bottom/text), for callers outside the extractors."""
+        self._load_words()
+        return [{"text": t, "x0": a, "top": b, "x1": c, "bottom": d}
+                for t, a, b, c, d in zip(self.word_texts, self.x0, self.top, self.x1, self.bottom)]
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    def cached(self, key, compute):
+        """compute() once per page (per key); for derived data the extractors share."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def spans(self, pattern: re.Pattern) -> tuple[list[int], list[int]]:
+        """(starts, ends) of pattern.finditer over the whole text, computed once per pattern."""
+        def compute():
+            starts, ends = [], []
+            for m in pattern.finditer(self.text):
+                starts.append(m.start()); ends.append(m.end())
+            return starts, ends
+        return self.cached(pattern, compute)
+
+    def search(self, pattern: re.Pattern, start: int = 0, end: int | None = None) -> str | None:
+        """
+        pattern.search(self.text[start:end]).group(0), answered from the page's token spans.
+        Exact for patterns without anchors or lookarounds: a match in the slice is a match
+        in the whole text, so the first whole-text token starting in the slice is the first
+        slice match, unless a token straddles a slice edge (then the slice is searched).
+        """
+        end = len(self.text) if end is None else end
+        starts, ends = self.spans(pattern)
+        k = bisect_left(starts, start)
+        if (k > 0 and ends[k - 1] > start) or (k < len(starts) and starts[k] < end < ends[k]):
+            m = pattern.search(self.text[start:end])
+            return m.group(0) if m else None
+        if k == len(starts) or starts[k] >= end:
+            return None
+        return self.text[starts[k]:ends[k]]
+
+    def lines_after(self, start: int, end: int, n: int = 2) -> list[str]:
+        """re.split(r"[\r\n]+", self.text[start:end])[1:1 + n], from the page's line-break index."""
+        if start >= end:  # empty slice: re.split gives [''], so nothing after it
+            return []
+        starts, ends = self.spans(_LINE_BREAKS)
+        out = []
+        k = bisect_right(ends, start)  # first break run ending after start
+        while len(out) < n and k < len(starts) and starts[k] < end:
+            a = min(ends[k], end)
+            b = min(starts[k + 1], end) if k + 1 < len(starts) else end
+            out.append(self.text[a:b])
+            k += 1
+        return out
+
+    def word_index(self) -> WordIndex:
+        self._load_words()
+        if self._index is None:
+            self._index = WordIndex(self.x0, self.top, self.x1, self.bottom, self.word_texts)
+        return self._index
+
+    def __getstate__(self):
+        # derived data is cheap to rebuild and not worth shipping between processes;
+        # deferred words are loaded first since the loader holds the open document
+        self._load_words()
+        return {k: getattr(self, k) for k in self.__slots__ if not k.startswith("_")}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self._index = self._lower = self._loader = None
+        self._memo = {}
+
+    def __repr__(self):
+        return f"Page({self.page_num}, {len(self.text)} chars, {self.n_words} words{', ocr' if self.ocr else ''})"
@@ -1,12 +1,30 @@
 # parser.py
 # Orchestrator: decrypt -> extract pages -> detect issuer -> run bank extractor(s)
 
-import io
+import os
+import copy
+import json
+import hashlib
+from itertools import chain, islice
 from typing import Any
 import pikepdf
-from utils import decrypt_pdf_bytes, extract_pages
-from config import ISSUERS, GENERIC_LABELS, BANK_LABELS
+from cache import MemoryLRUCache, DiskLRUCache
+from timing import StageTimer, NULL_TIMER
+from issuer import IssuerDetector
+from page import Page
+from fingerprint import FINGERPRINTS, pdf_fingerprint
+from utils import (
+    open_source, as_buffer, spool_pdf, spill_to_file, iter_pages, extract_pages, extract_pages_parallel, page_ranges,
+    new_page_stats, track_peak_memory, source_size,
+)
+from config import (
+    GENERIC_LABELS, BANK_LABELS, REPORT_PEAK_MEMORY, ISSUER_MIN_CONFIDENCE, LAYOUT_TEMPLATES,
+    PARALLEL_WORKERS, PARALLEL_MIN_PAGES,
+    RESULT_CACHE_ENTRIES, RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES,
+)
+import config
 from extractors import (
+    EXTRACTOR_VERSION,
     extract_idfc, extract_hdfc, extract_sbi, extract_axis, extract_icici, extract_generic
 )
 
@@ -18,52 +36,322 @@ EXTRACTOR_MAP = {
     "ICICI": extract_icici,
 }
 
-def _detect_issuer(pages) -> tuple[str, float]:
-    text_all = "\n".join(p["text"].lower() for p in pages)
-    scores = {}
-    for name, cfg in ISSUERS.items():
-        score = 0
-        for kw in cfg["keywords"]:
-            if kw in text_all:
-                score += 1
-        scores[name] = score
-    issuer = max(scores, key=scores.get)
-    conf = 1.0 if scores[issuer] > 0 else 0.0
-    return issuer if conf > 0 else "UNKNOWN", conf
-
-def parse_pdf(pdf_stream_or_bytesio: io.BytesIO, password: str | None, filename: str | None = None) -> dict[str, Any]:
-    # 1) decrypt in memory
-    raw = pdf_stream_or_bytesio.getvalue() if hasattr(pdf_stream_or_bytesio, "getvalue") else pdf_stream_or_bytesio.read()
-    try:
-        stream = decrypt_pdf_bytes(raw, password)
-    except ValueError:
-        return {
-            "success": False,
-            "error_type": "password_required",
-            "error": "Incorrect password or the PDF is encrypted.",
-            "issuer": None,
-            "issuer_confidence": 0.0,
-            "records": []
+_INFO_KEYS = ("/Title", "/Subject", "/Author", "/Keywords", "/Creator", "/Producer")
+
+_PASSWORD_REQUIRED = {
+    "success": False,
+    "error_type": "password_required",
+    "error": "Incorrect password or the PDF is encrypted.",
+    "issuer": None,
+    "issuer_confidence": 0.0,
+    "records": []
+}
+
+class PdfSession:
+    """
+    One uploaded document, opened once with pikepdf and shared by the encryption check,
+    the password test and parsing. Extracted pages and the parse result are kept on the
+    session, so the UI / batch runners never pay the document-open cost twice.
+    """
+
+    def __init__(self, pdf_src, filename: str | None = None, timer=NULL_TIMER):
+        self.filename = filename
+        self.timer = timer
+        self._src = as_buffer(pdf_src)
+        self._pdf = None          # pikepdf.Pdf once opened (or unlocked)
+        self._pages = None
+        self._page_stats = None   # extraction path counters of _pages
+        self._result = None
+        self.error = None
+        self.is_encrypted = False  # True when the document needs a user password
+        try:
+            with timer.stage("open"):
+                self._pdf = pikepdf.open(open_source(self._src))
+        except pikepdf.PasswordError:
+            self.is_encrypted = True
+        except Exception as e:
+            self.error = f"Error reading PDF: {str(e)}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def unlocked(self) -> bool:
+        return self._pdf is not None
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages) if self._pdf is not None else 0
+
+    def metadata_text(self) -> str:
+        """Document info strings (title, creator, producer, ...) for issuer detection."""
+        if self._pdf is None:
+            return ""
+        try:
+            info = self._pdf.docinfo
+            return "\n".join(str(info[k]) for k in _INFO_KEYS if k in info)
+        except Exception:
+            return ""
+
+    def unlock(self, password: str) -> tuple[bool, str]:
+        """Try a password. Returns (success, error_message); a no-op once unlocked."""
+        if self._pdf is not None:
+            return True, ""
+        try:
+            with self.timer.stage("unlock"):
+                self._pdf = pikepdf.open(open_source(self._src), password=password)
+            self.error = None
+            return True, ""
+        except pikepdf.PasswordError:
+            return False, "Incorrect password"
+        except Exception as e:
+            self.error = f"Error: {str(e)}"
+            return False, self.error
+
+    def lock(self):
+        """Drop the decrypted document and everything derived from it."""
+        if self.is_encrypted:
+            self.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+        self._pdf = None
+        self._pages = None
+        self._page_stats = None
+        self._result = None
+
+    def _plumber_stream(self):
+        # Unencrypted files go to pdfplumber untouched; only encrypted ones are rewritten.
+        if self._pdf.is_encrypted:
+            with self.timer.stage("decrypt"):
+                out = spool_pdf(self._pdf)
+            if self.timer.enabled:
+                self.timer.count("bytes_out", out.seek(0, os.SEEK_END)); out.seek(0)
+            return out
+        return open_source(self._src)
+
+    def _extract_parallel(self, workers: int, executor=None) -> list[Page]:
+        # Workers open the file themselves: hand them the input path, or a temp copy of the plain PDF.
+        self._page_stats = new_page_stats()
+        if isinstance(self._src, (str, os.PathLike)) and not self._pdf.is_encrypted:
+            return extract_pages_parallel(self._src, self.page_count, workers, self._page_stats, executor)
+        path = spill_to_file(self._plumber_stream())
+        try:
+            return extract_pages_parallel(path, self.page_count, workers, self._page_stats, executor)
+        finally:
+            os.unlink(path)
+
+    @property
+    def pages(self) -> list[Page]:
+        """Per-page text + word boxes, extracted on first access."""
+        if self._pages is None:
+            if self._pdf is None:
+                raise ValueError(self.error or "PDF is locked - call unlock() first")
+            self._page_stats = new_page_stats()
+            self._pages = extract_pages(self._plumber_stream(), self._page_stats)
+        return self._pages
+
+    def parse(self, password: str | None = None, workers: int | None = None, executor=None) -> dict[str, Any]:
+        """
+        Detect issuer and extract fields; the result is computed once per session.
+        workers > 1 (default config.PARALLEL_WORKERS) extracts all pages over a process pool
+        instead of the lazy serial pipeline; `executor` lets callers share one pool.
+        """
+        if self._result is not None:
+            return self._result
+        if self._pdf is None:
+            if not self.is_encrypted:  # the document could not be opened at all
+                return {"success": False, "error_type": "invalid_pdf", "error": self.error, "records": []}
+            if not (password and self.unlock(password)[0]):
+                if self.error:  # unlock failed for a reason other than the password
+                    return {"success": False, "error_type": "invalid_pdf", "error": self.error, "records": []}
+                return {**_PASSWORD_REQUIRED, "records": []}
+
+        # 1) issuer before any text extraction: the metadata when it is conclusive on its own,
+        #    else a known generator fingerprint (which also gives the pages holding the fields).
+        #    Generators are shared between banks, so a plan is only followed while the keywords
+        #    (metadata here, page 1's header below) do not name another issuer.
+        detector = IssuerDetector()
+        with self.timer.stage("detect_issuer"):
+            detector.add_metadata(self.metadata_text())
+            issuer, conf = detector.result()
+        source = "metadata"
+        with self.timer.stage("fingerprint"):
+            fp = pdf_fingerprint(self._pdf)
+            plan = FINGERPRINTS.plan(fp)
+        if plan and issuer not in ("UNKNOWN", plan["issuer"]):
+            plan = None
+        first = plan["field_pages"] if plan else ()
+        independent = True  # issuer found without trusting the plan
+        if plan:
+            independent = issuer == plan["issuer"]
+            issuer, conf, source = plan["issuer"], 1.0, "fingerprint"
+        known = conf >= ISSUER_MIN_CONFIDENCE
+        template = LAYOUT_TEMPLATES.get(issuer) if known else None
+
+        # 2) pages are extracted lazily (text + words with OCR fallback); with a layout template
+        #    the summary-box crop comes first and full pages only if a field is still missing
+        stats = new_page_stats()
+        workers = PARALLEL_WORKERS if workers is None else workers
+        if self._pages is None and workers > 1 and self.page_count >= PARALLEL_MIN_PAGES:
+            with self.timer.stage("extract_parallel", workers=workers):
+                self._pages = self._extract_parallel(workers, executor=executor)
+        if self._pages is not None:
+            page_iter = chain.from_iterable(self._pages[a:b] for a, b in page_ranges(len(self._pages), first))
+            stats.update(self._page_stats)
+        else:
+            region = (template["page"], template["bbox"]) if template else None
+            page_iter = iter_pages(self._plumber_stream(), stats, self.timer, first=first, region=region)
+        try:
+            # 3) otherwise detect from page 1, pulling more pages only while it is ambiguous
+            head = []
+            if known:
+                head = list(islice(page_iter, 1))
+                if head and source == "fingerprint":
+                    with self.timer.stage("detect_issuer"):
+                        detector.add_page(head[0].text)
+                        found, found_conf = detector.result()
+                    independent = independent or found == issuer
+                    if found not in ("UNKNOWN", issuer):  # the plan belongs to another bank
+                        issuer, conf = found, found_conf
+                        independent, known = True, found_conf >= ISSUER_MIN_CONFIDENCE
+                        source = "keywords"
+            if not known:
+                source = "keywords"
+                for p in page_iter:
+                    head.append(p)
+                    with self.timer.stage("detect_issuer"):
+                        detector.add_page(p.text)
+                        issuer, conf = detector.result()
+                    if conf >= ISSUER_MIN_CONFIDENCE:
+                        break
+            if not head:
+                return {"success": False, "error": "No pages found", "error_type": "empty", "records": []}
+            if self.timer.enabled:
+                self.timer.count("issuer_pages", len(head))
+
+            # 4) run bank-specific extractor (or generic); it stops pulling pages once all fields are found
+            # (page extraction pulled from inside is timed as its own nested stages)
+            pages = chain(head, page_iter)
+            with self.timer.stage("extract_fields"):
+                if issuer in EXTRACTOR_MAP:
+                    bank_labels = BANK_LABELS.get(issuer, GENERIC_LABELS)
+                    records = EXTRACTOR_MAP[issuer](pages, bank_labels)
+                else:
+                    records = extract_generic(pages, GENERIC_LABELS)
+        finally:
+            if hasattr(page_iter, "close"):
+                page_iter.close()
+
+        self._result = {
+            "success": True,
+            "input_bytes": source_size(self._src),
+            "issuer": issuer,
+            "issuer_confidence": conf,
+            "issuer_source": source,
+            "records": records,
+            "stats": stats,
         }
+        if independent:
+            # never learn from the plan's own issuer: a wrong plan would only reinforce itself
+            FINGERPRINTS.learn(fp, self._result)
+        return self._result
 
-    # 2) extract pages (text + words with OCR fallback)
-    pages = extract_pages(stream)
-    if not pages:
-        return {"success": False, "error": "No pages found", "error_type": "empty", "records": []}
+# ---- whole-document result cache ----
+RESULT_CACHE = MemoryLRUCache(RESULT_CACHE_ENTRIES)
+RESULT_DISK_CACHE = DiskLRUCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES) if RESULT_CACHE_DIR else None
 
-    # 3) detect issuer
-    issuer, conf = _detect_issuer(pages)
+def _config_fingerprint() -> str:
+    """Changes whenever the label dictionaries or the extractor version change."""
+    blob = json.dumps(
+        [EXTRACTOR_VERSION, config.ISSUERS, config.BANK_LABELS, config.GENERIC_LABELS,
+         config.CARD_NEGATIVE_CONTEXT, config.SEARCH_WINDOW_CHARS,
+         config.ISSUER_MIN_CONFIDENCE, config.ISSUER_HEADER_CHARS, config.LAYOUT_TEMPLATES,
+         config.OCR_LABEL_MAX_ERRORS, config.OCR_LABEL_CHARS_PER_ERROR],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
 
-    # 4) run bank-specific extractor (or generic)
-    if issuer in EXTRACTOR_MAP:
-        bank_labels = BANK_LABELS.get(issuer, GENERIC_LABELS)
-        records = EXTRACTOR_MAP[issuer](pages, bank_labels)
+def _result_cache_key(pdf_src, password: str | None) -> str:
+    """
+    Hash of the input, the password (a cached result is never served without it), the
+    config fingerprint and the fingerprint table's generation (a learned plan changes
+    which issuer and pages a parse uses). Not free: the whole input is read and hashed,
+    a few ms per MB, which a hit still saves many times over.
+    """
+    h = hashlib.blake2b(digest_size=32)
+    if isinstance(pdf_src, (str, os.PathLike)):
+        with open(pdf_src, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
     else:
-        records = extract_generic(pages, GENERIC_LABELS)
-
-    return {
-        "success": True,
-        "issuer": issuer,
-        "issuer_confidence": conf,
-        "records": records
-    }
+        h.update(pdf_src)  # bytes / memoryview from as_buffer: hashed in place
+    h.update(b"\0pw:" + (password or "").encode("utf-8"))
+    h.update(b"\0cfg:" + _config_fingerprint().encode())
+    h.update(b"\0plans:" + FINGERPRINTS.generation.encode())
+    return h.hexdigest()
+
+def clear_result_cache():
+    RESULT_CACHE.clear()
+    if RESULT_DISK_CACHE is not None:
+        RESULT_DISK_CACHE.clear()
+
+def parse_pdf(pdf_src, password: str | None, filename: str | None = None,
+              measure_memory: bool | None = None, workers: int | None = None,
+              timings: bool = False, hooks=()) -> dict[str, Any]:
+    """
+    pdf_src: bytes, memoryview, BytesIO/file object or a file path (memory-mapped).
+    With measure_memory (default config.REPORT_PEAK_MEMORY) the result carries
+    "peak_memory_bytes" for this document. workers: see PdfSession.parse.
+    Successful results are cached by input hash + password + config fingerprint + learned
+    plans (memory LRU, plus disk when config.RESULT_CACHE_DIR is set); hits carry "cached": True.
+    timings=True (or any hooks, see timing.py) adds a "timings" block: per-stage
+    wall/CPU time, per-page OCR flags and durations, bytes in/out and page counts.
+    """
+    timer = StageTimer(hooks) if (timings or hooks) else NULL_TIMER
+    pdf_src = as_buffer(pdf_src)
+    with timer.stage("cache_lookup"):
+        key = _result_cache_key(pdf_src, password)
+        hit = RESULT_CACHE.get(key)
+        if hit is None and RESULT_DISK_CACHE is not None:
+            hit = RESULT_DISK_CACHE.get(key)
+            if hit is not None:
+                RESULT_CACHE.put(key, hit)
+    if hit is not None:
+        result = {**copy.deepcopy(hit), "cached": True}
+        if timer.enabled:
+            result["timings"] = timer.report()
+        return result
+
+    result = _parse_uncached(pdf_src, password, filename, measure_memory, workers, timer)
+    if result.get("success"):
+        cached = {k: v for k, v in result.items() if k != "timings"}
+        RESULT_CACHE.put(key, copy.deepcopy(cached))
+        if RESULT_DISK_CACHE is not None:
+            RESULT_DISK_CACHE.put(key, cached)
+    if timer.enabled:
+        timer.count("bytes_in", source_size(pdf_src))
+        stats = result.get("stats") or {}
+        keys = ("page_count", "pages_materialized", "region_pages", "ocr_pages", "text_pages",
+                "ocr_preflight_pages", "ocr_fallback_pages", "layout_fallbacks")
+        timer.counters.update({k: stats[k] for k in keys if k in stats})
+        result["timings"] = timer.report()
+    return result
+
+def _parse_uncached(pdf_src, password, filename, measure_memory, workers, timer) -> dict[str, Any]:
+    if measure_memory is None:
+        measure_memory = REPORT_PEAK_MEMORY
+    if not measure_memory:
+        return _parse(pdf_src, password, filename, workers, timer)
+    with track_peak_memory() as mem:
+        result = _parse(pdf_src, password, filename, workers, timer)
+    result["peak_memory_bytes"] = mem["peak_bytes"]
+    return result
+
+def _parse(pdf_src, password: str | None, filename: str | None, workers: int | None, timer) -> dict[str, Any]:
+    with PdfSession(pdf_src, filename, timer) as session:
+        return session.parse(password, workers=workers)
@@ -0,0 +1,130 @@
+# synthetic.py
+# Deterministic synthetic statements for benchmarks (no real customer data needed).
+# Page 1 carries the issuer's summary box in a layout close to the real statements;
+# the remaining pages are transaction listings. Variants: text layer or image-only
+# (scanned), plain or password-protected.
+
+import io
+import random
+from datetime import date, timedelta
+import pikepdf
+from pikepdf import Dictionary, Name
+
+PAGE_W, PAGE_H = 612, 792  # US Letter, points
+ISSUER_HEADERS = {
+    "IDFC":  "IDFC FIRST Bank Credit Card Statement",
+    "HDFC":  "HDFC Bank Credit Card Statement",
+    "SBI":   "SBI Card Monthly Statement",
+    "AXIS":  "Axis Bank Credit Card Statement",
+    "ICICI": "ICICI Bank Credit Card Statement",
+}
+PASSWORD = "bench1234"
+
+def _money(v: float) -> str:
+    return f"{v:,.2f}"
+
+def statement_truth(issuer: str, seed: int = 0) -> dict:
+    """The field values a statement for (issuer, seed) is generated with."""
+    rnd = random.Random(f"{issuer}:{seed}")
+    total = round(rnd.uniform(1500, 95000), 2)
+    due = date(2024, 1, 1) + timedelta(days=rnd.randrange(0, 365))
+    return {
+        "card_last": f"{rnd.randrange(1000, 10000)}",
+        "total_amount_due": total,
+        "minimum_amount_due": round(total * 0.05, 2),
+        "payment_due_date": due.isoformat(),
+        "available_credit_limit": round(rnd.uniform(10000, 300000), 2),
+    }
+
+def _summary_lines(issuer: str, t: dict) -> list[str]:
+    due = date.fromisoformat(t["payment_due_date"])
+    card = f"XXXX XXXX XXXX {t['card_last']}"
+    if issuer == "ICICI":
+        # label row with values on the row below, like the ICICI summary table
+        return [
+            ISSUER_HEADERS[issuer], f"Credit Card Number {card}", "",
+            "PAYMENT DUE DATE      TOTAL AMOUNT DUE      MINIMUM AMOUNT DUE",
+            f"{due.strftime('%B %d, %Y')}      Rs. {_money(t['total_amount_due'])}      Rs. {_money(t['minimum_amount_due'])}",
+            "", f"Available Credit (including cash) Rs. {_money(t['available_credit_limit'])}",
+        ]
+    if issuer == "SBI":
+        return [
+            ISSUER_HEADERS[issuer], f"Card Number {card}", "",
+            f"*Total Amount Due Rs. {_money(t['total_amount_due'])}",
+            f"**Minimum Amount Due Rs. {_money(t['minimum_amount_due'])}",
+            f"Payment Due Date {due.strftime('%d %b %Y')}",
+            f"Available Credit Limit Rs. {_money(t['available_credit_limit'])}",
+        ]
+    return [
+        ISSUER_HEADERS[issuer], f"Card No. {card}", "",
+        f"Total Amount Due: Rs. {_money(t['total_amount_due'])}",
+        f"Minimum Amount Due: Rs. {_money(t['minimum_amount_due'])}",
+        f"Payment Due Date: {due.strftime('%d/%m/%Y')}",
+        f"Available Credit Limit: Rs. {_money(t['available_credit_limit'])}",
+    ]
+
+def _transaction_lines(rnd: random.Random, page_num: int, n: int = 40) -> list[str]:
+    lines = [f"Transactions (page {page_num})", "Date        Description                          Amount"]
+    for _ in range(n):
+        d = date(2024, 1, 1) + timedelta(days=rnd.randrange(0, 365))
+        merchant = rnd.choice(["AMAZON", "SWIGGY", "UBER", "IRCTC", "BIGBASKET", "ZOMATO", "FLIPKART"])
+        lines.append(f"{d.strftime('%d/%m/%Y')}  {merchant} REF{rnd.randrange(10**9, 10**10)}  {_money(rnd.uniform(50, 20000))}")
+    return lines
+
+def _escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _text_stream(lines: list[str]) -> bytes:
+    ops = ["BT", "/F1 10 Tf", "12 TL", f"40 {PAGE_H - 50} Td"]
+    for line in lines:
+        ops.append(f"({_escape(line)}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1", "replace")
+
+def _render_image(lines: list[str], dpi: int = 150) -> bytes:
+    """Rasterize lines to a grayscale JPEG, as a scanner would."""
+    from PIL import Image, ImageDraw, ImageFont
+    scale = dpi / 72
+    img = Image.new("L", (int(PAGE_W * scale), int(PAGE_H * scale)), 255)
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=int(10 * scale))
+    except TypeError:  # Pillow < 10.1: bitmap font only
+        font = ImageFont.load_default()
+    y = 50 * scale
+    for line in lines:
+        draw.text((40 * scale, y), line, fill=0, font=font)
+        y += 12 * scale
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+def make_statement(issuer: str, pages: int = 1, scanned: bool = False,
+                   encrypted: bool = False, seed: int = 0) -> bytes:
+    """PDF bytes of a synthetic statement; ground truth is statement_truth(issuer, seed)."""
+    truth = statement_truth(issuer, seed)
+    rnd = random.Random(f"{issuer}:{seed}:tx")
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(Dictionary(
+        Type=Name.Font, Subtype=Name.Type1, BaseFont=Name.Helvetica, Encoding=Name.WinAnsiEncoding,
+    ))
+    for n in range(1, pages + 1):
+        lines = _summary_lines(issuer, truth) if n == 1 else _transaction_lines(rnd, n)
+        page = pdf.add_blank_page(page_size=(PAGE_W, PAGE_H))
+        if scanned:
+            jpeg = _render_image(lines)
+            from PIL import Image
+            w, h = Image.open(io.BytesIO(jpeg)).size
+            image = pikepdf.Stream(pdf, jpeg, Type=Name.XObject, Subtype=Name.Image, Width=w, Height=h,
+                                   ColorSpace=Name.DeviceGray, BitsPerComponent=8, Filter=Name.DCTDecode)
+            page.Resources = Dictionary(XObject=Dictionary(Im0=image))
+            page.Contents = pdf.make_stream(f"q {PAGE_W} 0 0 {PAGE_H} 0 0 cm /Im0 Do Q".encode())
+        else:
+            page.Resources = Dictionary(Font=Dictionary(F1=font))
+            page.Contents = pdf.make_stream(_text_stream(lines))
+    out = io.BytesIO()
+    if encrypted:
+        pdf.save(out, encryption=pikepdf.Encryption(user=PASSWORD, owner=PASSWORD + "-owner", R=6))
+    else:
+        pdf.save(out, deterministic_id=True)
+    return out.getvalue()
@@ -24,7 +24,8 @@ print("\n2️⃣ Checking required packages...")
 required_packages = {
     'streamlit': 'Streamlit',
     'pdfplumber': 'PDFPlumber',
-    'pandas': 'Pandas',
+    'pikepdf': 'pikepdf',
+    'pytesseract': 'pytesseract',
     'dateutil': 'python-dateutil',
     'PIL': 'Pillow'
 }
@@ -45,7 +46,7 @@ if missing_packages:
 
 # Test 3: Local modules
 print("\n3️⃣ Checking local modules...")
-local_modules = ['config', 'utils', 'parser', 'extractors', 'validators']
+local_modules = ['config', 'utils', 'parser', 'extractors', 'cc_validators']
 
 missing_modules = []
 for module in local_modules:
@@ -67,28 +68,28 @@ if missing_modules:
 # Test 4: Import main components
 print("\n4️⃣ Testing main components...")
 try:
-    from parser import PDFParser
-    print("   ✅ PDFParser class")
+    from parser import parse_pdf, PdfSession
+    print("   ✅ parse_pdf / PdfSession")
 except Exception as e:
-    print(f"   ❌ PDFParser - {str(e)}")
+    print(f"   ❌ parse_pdf - {str(e)}")
     sys.exit(1)
 
 try:
-    from extractors import FieldExtractor
-    print("   ✅ FieldExtractor class")
+    from extractors import extract_generic, EXTRACTOR_VERSION
+    print("   ✅ Field extractors")
 except Exception as e:
-    print(f"   ❌ FieldExtractor - {str(e)}")
+    print(f"   ❌ Field extractors - {str(e)}")
     sys.exit(1)
 
 try:
-    from cc_validators import validate_all_fields
+    from cc_validators import sanity_check
     print("   ✅ Validators")
 except Exception as e:
     print(f"   ❌ Validators - {str(e)}")
     sys.exit(1)
 
 try:
-    from config import ISSUERS, FIELD_NAMES
+    from config import ISSUERS, BANK_LABELS, GENERIC_LABELS
     print(f"   ✅ Configuration ({len(ISSUERS)} issuers loaded)")
     
     # Verify IDFC First Bank is configured
@@ -103,13 +104,13 @@ except Exception as e:
 # Test 5: Utility functions
 print("\n5️⃣ Testing utility functions...")
 try:
-    from utils import normalize_text, parse_date, extract_amount, extract_last4_digits
+    from utils import normalize, parse_date, parse_amount, last_tail
     
-    # Test normalize_text
+    # Test normalize
     test_text = "  Hello   World  "
-    result = normalize_text(test_text)
-    assert result == "Hello World", "normalize_text failed"
-    print("   ✅ normalize_text()")
+    result = normalize(test_text)
+    assert result == "Hello World", "normalize failed"
+    print("   ✅ normalize()")
     
     # Test parse_date
     test_date = "01/12/2024"
@@ -117,17 +118,17 @@ try:
     assert result is not None, "parse_date failed"
     print("   ✅ parse_date()")
     
-    # Test extract_amount
+    # Test parse_amount
     test_amount = "₹1,234.56"
-    result = extract_amount(test_amount)
-    assert result == 1234.56, f"extract_amount failed: got {result}"
-    print("   ✅ extract_amount()")
+    result = parse_amount(test_amount)
+    assert result == 1234.56, f"parse_amount failed: got {result}"
+    print("   ✅ parse_amount()")
     
-    # Test extract_last4_digits
+    # Test last_tail
     test_card = "XXXX XXXX XXXX 1234"
-    result = extract_last4_digits(test_card)
-    assert result == "1234", "extract_last4_digits failed"
-    print("   ✅ extract_last4_digits()")
+    result, _n = last_tail(test_card)
+    assert result == "1234", "last_tail failed"
+    print("   ✅ last_tail()")
     
 except AssertionError as e:
     print(f"   ❌ Utility test failed: {str(e)}")
@@ -146,7 +147,7 @@ required_files = [
     'extractors.py',
     'config.py',
     'utils.py',
-    'validators.py',
+    'cc_validators.py',
     'requirements.txt',
     'README.md'
 ]
@@ -0,0 +1,103 @@
+# tests/test_amounts.py
+# The amount grammar: accepted formats, signs and currency markers, what it must not read
+# as an amount, and the per-page amount index used by _find_amount.
+
+import random
+import re
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+
+from config import SEARCH_WINDOW_CHARS
+from extractors import _find_amount, _window_after_label
+from page import Page
+from utils import match_amount, parse_amount, scan_amounts
+
+@pytest.mark.parametrize("text, value, kind", [
+    ("1,23,456.78", 123456.78, "indian"),
+    ("99,99,99,999", 999999999.0, "indian"),
+    ("123,456.78", 123456.78, "western"),
+    ("1,234", 1234.0, "western"),
+    ("5000", 5000.0, "plain"),
+    ("5000.5", 5000.5, "plain"),
+    ("61.70", 61.7, "plain"),
+    ("0.00", 0.0, "zero"),
+    ("0", 0.0, "zero"),
+])
+def test_number_formats(text, value, kind):
+    a = match_amount(f"Total Amount Due: {text} ")
+    assert (a.value, a.kind, a.raw) == (value, kind, text)
+
+@pytest.mark.parametrize("text, value, sign, currency", [
+    ("₹ 1,234.00", 1234.0, 1, "₹"),
+    ("`1,234.00", 1234.0, 1, "₹"),  # how some PDFs encode the rupee sign
+    ("Rs.500", 500.0, 1, "₹"),
+    ("Rs 500", 500.0, 1, "₹"),
+    ("rs. 500", 500.0, 1, "₹"),
+    ("500 CR", 500.0, -1, ""),
+    ("Rs. 1,500.00 Cr", 1500.0, -1, "₹"),
+    ("500 Dr", 500.0, 1, ""),
+    ("500 CRORE", 500.0, 1, ""),  # CR only as a whole word
+])
+def test_signs_and_currency(text, value, sign, currency):
+    a = match_amount(text)
+    assert (a.value, a.sign, a.currency) == (value, sign, currency)
+
+@pytest.mark.parametrize("text", [
+    "12/08/2024", "5/9/22", "12-08-2024", "2024-01-05",  # dates
+    "1234567812345678", "12345678901", "Rs. 1234567812345678", "99999999999.00",  # IDs, too large
+    "1.234", "1,234.567", "5,00", "12,34,5678",  # malformed grouping / decimals
+    "", None, "no amount here",
+])
+def test_not_amounts(text):
+    assert match_amount(text) is None
+    assert parse_amount(text) is None
+
+def test_scan_offsets():
+    text = "Total 1,234.00 min Rs. 61.70 CR due 12/08/2024 card 1234567812345678 `99"
+    amounts = scan_amounts(text)
+    assert [a.raw for a in amounts] == ["1,234.00", "Rs. 61.70 CR", "`99"]
+    for a in amounts:
+        assert text[a.start:a.end] == a.raw
+    assert [a.value * a.sign for a in amounts] == [1234.0, -61.7, 99.0]
+
+def test_scan_matches_first_match_at_each_offset():
+    rnd = random.Random(4)
+    pieces = ["Rs. ", "₹", "`", "1,234.00", "1,23,456", "5000", "0.5", " CR", " Dr", "12/08/2024",
+              "2024-01-05", "-", ",", ".", "/", " ", "\n", "1234567812345678", "Total Due"]
+    for _ in range(2000):
+        text = "".join(rnd.choice(pieces) for _ in range(rnd.randrange(0, 25)))
+        amounts = scan_amounts(text)
+        assert amounts == sorted(amounts, key=lambda a: a.start)
+        assert match_amount(text) == (amounts[0] if amounts else None)
+        for a in amounts:
+            assert text[a.start:a.end] == a.raw
+
+def _find_amount_scan(page, labels):
+    """_find_amount without the bisect: a linear walk over the page's amounts."""
+    text, amounts = page.text, scan_amounts(page.text)
+    for lbl in labels:
+        idx = page.lower.find(lbl.lower())
+        if idx == -1:
+            continue
+        j = idx + len(lbl)
+        after = [a for a in amounts if a.start >= j]
+        if after and after[0].end <= j + SEARCH_WINDOW_CHARS:
+            return after[0].value, {"snippet": _window_after_label(text, lbl, idx)[:180], "page": page.page_num}
+        lines = re.split(r"[\r\n]+", text[idx:idx + SEARCH_WINDOW_CHARS])[1:3]
+        if lines:
+            blk = " ".join(lines)
+            a = match_amount(blk)
+            if a is not None:
+                return a.value, {"snippet": blk[:180], "page": page.page_num}
+    return None, None
+
+def test_find_amount_matches_linear_scan():
+    rnd = random.Random(9)
+    labels = ["Total Amount Due", "Minimum Amount Due", "Amount Due"]
+    pieces = ["Total Amount Due", "Minimum Amount Due", ": ", "Rs. ", "1,234.00", "61.70 CR",
+              "12/08/2024", "\n", " " * 50, "x" * 120, "Card 1234567812345678", "5000"]
+    for _ in range(1500):
+        text = "".join(rnd.choice(pieces) for _ in range(rnd.randrange(1, 30)))
+        assert _find_amount(Page(1, text), labels) == _find_amount_scan(Page(1, text), labels), text
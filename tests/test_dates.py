@@ -0,0 +1,50 @@
+# tests/test_dates.py
+# parse_date must return exactly what the strptime reference returns.
+
+import random
+from datetime import date, timedelta
+import pytest
+
+pytest.importorskip("pdfplumber")
+
+from utils import parse_date, _parse_date_strptime, _DATE_FORMATS
+
+EDGE_CASES = [
+    None, "", "no date here", "Due 31/04/2024", "29/02/2023", "29/02/2024", "29-02-1900", "29-02-2000",
+    "00/01/2024", "01/00/2024", "32/01/2024", "01/13/2024", "5/9/22", "05-09-69", "05-09-68", "5/9/022",
+    "5/9/20244", "1/1/1", "2024-02-30", "2024-13-01", "2024-1-01", "5 September 2022", "5 SEPT 2022",
+    "5 sep 22", "05 Sept 2022", "31 Apr 2024", "September 5, 2022", "SEPTEMBER 5,2022", "Sep 5 2022",
+    "Sep 05,  2022", "Sept 5, 2022", "Mayday 5 2022", "Due Date: 15/03/2024 Total 1,234.00",
+    "Statement 12 Mar 2024 to 11 Apr 2024", "Rs. 5,000 due on Jan 15, 2024", "ref 1234567/12/2024",
+    "2024-03-15T10:00", "x15-03-2024y", "1/2/3/2024", "Jan 2024", "12 Jun 2024 / 2024-06-12",
+]
+
+def test_known_values():
+    assert parse_date("Payment Due Date: 05/09/2022") == "2022-09-05"
+    assert parse_date("September 5, 2022") == "2022-09-05"
+    assert parse_date("5/9/69") == "1969-09-05"
+    assert parse_date("31/04/2024") is None
+
+def test_edge_cases_match_strptime():
+    for s in EDGE_CASES:
+        assert parse_date(s) == _parse_date_strptime(s), s
+
+def test_every_format_with_noise_matches_strptime():
+    rnd = random.Random(7)
+    noise = ["", "Payment Due Date: ", "Rs. 1,234.56 ", "due on ", "(", "12 "]
+    tails = ["", " ", ")", " Total", ", 2024", " 99"]
+    formats = _DATE_FORMATS + ["%-d/%-m/%Y", "%b %d, %Y", "%B %d,%Y", "%d %B %y"]
+    for _ in range(3000):
+        d = date(1960, 1, 1) + timedelta(days=rnd.randrange(0, 40000))
+        text = d.strftime(rnd.choice(formats))
+        if rnd.random() < 0.3:
+            text = text.upper() if rnd.random() < 0.5 else text.lower()
+        s = rnd.choice(noise) + text + rnd.choice(tails)
+        assert parse_date(s) == _parse_date_strptime(s), s
+
+def test_random_digit_soup_matches_strptime():
+    rnd = random.Random(11)
+    alphabet = "0123456789/- ,JanFebSepOctMay"
+    for _ in range(5000):
+        s = "".join(rnd.choice(alphabet) for _ in range(rnd.randrange(4, 20)))
+        assert parse_date(s) == _parse_date_strptime(s), s
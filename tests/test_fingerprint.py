@@ -0,0 +1,69 @@
+# tests/test_fingerprint.py
+# Learned generator plans must never override what the keywords say about the issuer.
+
+import io
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+pytest.importorskip("pdfplumber")
+
+import parser as pdf_parser
+from extractors import FIELDS
+from fingerprint import FingerprintTable, pdf_fingerprint
+from synthetic import make_statement
+
+def _result(issuer: str) -> dict:
+    rec = {k: "x" for k in FIELDS}
+    rec["evidence"] = {k: {"page": 1} for k in FIELDS}
+    return {"success": True, "issuer": issuer, "records": [rec]}
+
+def test_fingerprint_seen_with_two_issuers_is_never_served():
+    table = FingerprintTable(min_seen=2)
+    table.learn("fp", _result("IDFC"))
+    table.learn("fp", _result("IDFC"))
+    assert table.plan("fp")["issuer"] == "IDFC"
+    table.learn("fp", _result("HDFC"))
+    assert table.plan("fp") is None
+
+def test_shared_fingerprint_does_not_lock_in_an_issuer(monkeypatch):
+    table = FingerprintTable(min_seen=2)
+    monkeypatch.setattr(pdf_parser, "FINGERPRINTS", table)
+    pdf_parser.clear_result_cache()
+    docs = [(issuer, make_statement(issuer, seed=i))
+            for i, issuer in enumerate(["IDFC", "IDFC", "HDFC", "HDFC", "AXIS"])]
+    fps = set()
+    for _, pdf in docs:
+        with pikepdf.open(io.BytesIO(pdf)) as doc:
+            fps.add(pdf_fingerprint(doc))
+    assert len(fps) == 1  # one generator for every bank: the plan learned from IDFC applies to all
+
+    for issuer, pdf in docs:
+        result = pdf_parser.parse_pdf(pdf, None)
+        assert result["issuer"] == issuer
+        assert result["issuer_source"] != "fingerprint" or issuer == "IDFC"
+    pdf_parser.clear_result_cache()
+
+def test_generation_tracks_served_plans_only():
+    table = FingerprintTable(min_seen=2)
+    start = table.generation
+    table.learn("fp", _result("IDFC"))
+    assert table.generation == start  # not served yet
+    table.learn("fp", _result("IDFC"))
+    served = table.generation
+    assert served != start
+    table.learn("fp", _result("IDFC"))
+    assert table.generation == served
+    table.learn("fp", _result("HDFC"))
+    assert table.generation == start
+
+def test_cached_results_are_keyed_by_learned_plans(monkeypatch):
+    table = FingerprintTable(min_seen=1)
+    monkeypatch.setattr(pdf_parser, "FINGERPRINTS", table)
+    pdf_parser.clear_result_cache()
+    pdf = make_statement("IDFC", pages=2)
+    assert pdf_parser.parse_pdf(pdf, None)["issuer_source"] != "fingerprint"
+    # the parse taught the table a plan: the next parse must not be answered from before it
+    second = pdf_parser.parse_pdf(pdf, None)
+    assert "cached" not in second and second["issuer_source"] == "fingerprint"
+    assert pdf_parser.parse_pdf(pdf, None).get("cached")
+    pdf_parser.clear_result_cache()
@@ -0,0 +1,62 @@
+# tests/test_issuer.py
+# Graded issuer confidence: header vs. deep hits, page decay and the runner-up gap.
+
+import pytest
+
+from config import ISSUER_HEADER_CHARS, ISSUER_MIN_CONFIDENCE
+from issuer import DEEP_HIT_WEIGHT, IssuerDetector, detect_issuer
+from page import Page
+
+BANKS = {
+    "ALPHA": {"keywords": ["alpha bank", "alphacard"]},
+    "BETA": {"keywords": ["beta bank"]},
+}
+FILLER = "x" * ISSUER_HEADER_CHARS  # pushes a keyword past the header
+
+def _detect(metadata="", pages=()):
+    det = IssuerDetector(BANKS)
+    det.add_metadata(metadata)
+    for text in pages:
+        det.add_page(text)
+    return det.result()
+
+def test_metadata_only():
+    assert _detect("Alpha Bank e-Statement") == ("ALPHA", 1.0)
+
+def test_page_one_header():
+    assert _detect(pages=["ALPHA BANK Credit Card Statement"]) == ("ALPHA", 1.0)
+
+def test_deep_hit_counts_less():
+    assert _detect(pages=[FILLER + " alpha bank"]) == ("ALPHA", DEEP_HIT_WEIGHT)
+
+def test_later_pages_decay():
+    assert _detect(pages=["no names here", "alpha bank"]) == ("ALPHA", 0.5)
+    assert _detect(pages=["", "", FILLER + "alpha bank"]) == ("ALPHA", round(DEEP_HIT_WEIGHT / 3, 3))
+    # the strongest evidence for a keyword is kept
+    assert _detect(pages=[FILLER + "alpha bank", "alpha bank"]) == ("ALPHA", DEEP_HIT_WEIGHT)
+
+def test_page_naming_two_banks_is_low_confidence():
+    issuer, conf = _detect(pages=["Alpha Bank and Beta Bank co-branded card"])
+    assert (issuer, conf) == ("ALPHA", 0.0)  # a tie keeps the configured order
+    issuer, conf = _detect(pages=["Alpha Bank statement " + FILLER + " pay via Beta Bank"])
+    assert issuer == "ALPHA" and conf == pytest.approx(1 - DEEP_HIT_WEIGHT)
+    assert conf < ISSUER_MIN_CONFIDENCE
+
+def test_more_keywords_outweigh_the_runner_up():
+    assert _detect(pages=["Alpha Bank AlphaCard " + FILLER + " beta bank"]) == ("ALPHA", 0.7)
+
+def test_unknown():
+    assert _detect() == ("UNKNOWN", 0.0)
+    assert _detect("Microsoft Word", ["Statement of account", "Total Amount Due 1,234.00"]) == ("UNKNOWN", 0.0)
+
+def test_configured_issuers_from_their_headers():
+    pytest.importorskip("pikepdf")
+    from synthetic import ISSUER_HEADERS
+    for name, header in ISSUER_HEADERS.items():
+        det = IssuerDetector()
+        det.add_page(header + "\nCard No. XXXX XXXX XXXX 1234")
+        issuer, conf = det.result()
+        assert issuer == name and conf >= ISSUER_MIN_CONFIDENCE
+
+def test_detect_issuer_one_shot():
+    assert detect_issuer([Page(1, "Axis Bank Credit Card Statement")])[0] == "AXIS"
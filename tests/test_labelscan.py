@@ -0,0 +1,43 @@
+# tests/test_labelscan.py
+# LabelScanner.first_hits must agree with a str.find per label.
+
+import random
+
+from config import GENERIC_LABELS, BANK_LABELS
+from labelscan import LabelScanner, scanner_for
+
+def _reference(labels, low):
+    hits = {}
+    for l in {l.lower() for l in labels if l}:
+        i = low.find(l)
+        if i >= 0:
+            hits[l] = i
+    return hits
+
+def test_overlapping_and_prefix_labels():
+    labels = ["Total", "total amount due", "amount due", "due", "Due Date", "date", "total amount"]
+    for text in ["total amount due date", "due date: total", "xx total amount dux amount due",
+                 "totaltotal amount due", "date due total amount", "", "nothing here", "dudue datedate"]:
+        assert LabelScanner(labels).first_hits(text) == _reference(labels, text), text
+
+def test_labels_are_case_folded():
+    scanner = LabelScanner(["Card No.", "CARD NUMBER", "card no"])
+    assert scanner.labels == ["card no", "card no.", "card number"]
+    assert scanner.first_hits("primary card number 1234, card no. 99") == {
+        "card number": 8, "card no": 26, "card no.": 26}
+
+def test_config_labels_on_statement_text():
+    labels = tuple(l for group in GENERIC_LABELS.values() for l in group)
+    for bank in BANK_LABELS.values():
+        labels += tuple(l for group in bank.values() for l in group)
+    text = ("idfc first bank credit card statement card no. xxxx 1234 total amount due: rs. 5,000.00 "
+            "minimum amount due: rs. 250.00 payment due date: 05/09/2022 available credit limit 1,00,000 ")
+    assert scanner_for(labels).first_hits(text) == _reference(labels, text)
+
+def test_random_text_matches_find():
+    rnd = random.Random(3)
+    for _ in range(500):
+        labels = ["".join(rnd.choice("abc ") for _ in range(rnd.randrange(1, 6))) for _ in range(rnd.randrange(1, 8))]
+        labels = [l.upper() if rnd.random() < 0.2 else l for l in labels]
+        text = "".join(rnd.choice("abc ") for _ in range(rnd.randrange(0, 60)))
+        assert LabelScanner(labels).first_hits(text) == _reference(labels, text), (labels, text)
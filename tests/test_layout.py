@@ -0,0 +1,71 @@
+# tests/test_layout.py
+# WordIndex queries must return exactly what a linear scan of the word list returns.
+
+import random
+
+from layout import WordIndex, word_box
+
+def _scan_label_bbox(words, tokens, max_dy=150):
+    norm = [word_box(w) + (str(w.get("text", "")).strip().lower(),) for w in words]
+    norm = [w for w in norm if w[4]]
+    toks = [t.lower() for t in tokens if t]
+    if not toks:
+        return None
+    for i, (_x0, y0, _x1, _y1, t) in enumerate(norm):
+        if toks[0] not in t:
+            continue
+        found, k = [norm[i]], 1
+        for w in norm[i + 1:]:
+            if k == len(toks) or abs(w[1] - y0) > max_dy:
+                break
+            if toks[k] in w[4]:
+                found.append(w)
+                k += 1
+        if k == len(toks):
+            return (min(w[0] for w in found), min(w[1] for w in found),
+                    max(w[2] for w in found), max(w[3] for w in found))
+    return None
+
+def _scan_words_in_box(words, x0, top, x1, bottom):
+    out = []
+    for w in words:
+        a, b, c, d = word_box(w)
+        if c >= x0 and a <= x1 and d >= top and b <= bottom:
+            out.append((b, a, str(w.get("text", ""))))
+    return sorted(out)
+
+VOCAB = ["PAYMENT", "Due", "DATE", "payment", "due", "Date:", "15/08/2024", "March", "2024",
+         "Total", "Amount", "", " ", "duee", "xpaymentx", "Rs.", "1,234.00"]
+
+def _words(rnd, n):
+    words, y = [], 0.0
+    for _ in range(n):
+        y += rnd.choice([0, 0, 0, rnd.uniform(-30, 60)])
+        x, h, w = rnd.uniform(0, 600), rnd.uniform(0, 15), rnd.uniform(5, 80)
+        text = rnd.choice(VOCAB)
+        if rnd.random() < 0.5:  # pdfplumber word
+            words.append({"text": text, "x0": x, "x1": x + w, "top": y, "bottom": y + h})
+        else:  # Tesseract word
+            words.append({"text": text, "left": int(x), "top": int(y), "width": int(w), "height": int(h)})
+    return words
+
+def test_label_bbox_matches_scan():
+    rnd = random.Random(5)
+    token_sets = [["payment", "due", "date"], ["due"], ["payment", "due"], ["date", "payment"],
+                  ["", "DUE", "date"], [], ["nowhere"]]
+    for _ in range(1500):
+        words = _words(rnd, rnd.randrange(0, 80))
+        index = WordIndex.from_words(words)
+        for toks in token_sets:
+            for dy in (0, 40, 150):
+                assert index.label_bbox(toks, max_dy=dy) == _scan_label_bbox(words, toks, max_dy=dy), (words, toks, dy)
+
+def test_words_in_box_matches_scan():
+    rnd = random.Random(6)
+    for _ in range(1500):
+        words = _words(rnd, rnd.randrange(0, 80))
+        index = WordIndex.from_words(words)
+        for _ in range(5):
+            x0, top = rnd.uniform(-50, 600), rnd.uniform(-50, 800)
+            box = (x0, top, x0 + rnd.uniform(0, 300), top + rnd.uniform(0, 250))
+            assert index.words_in_box(*box) == _scan_words_in_box(words, *box), (words, box)
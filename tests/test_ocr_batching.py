@@ -0,0 +1,39 @@
+# tests/test_ocr_batching.py
+# Scanned pages are OCR'd in batches sized to what the consumer actually pulls.
+
+import io
+from itertools import islice
+import pytest
+
+pytest.importorskip("pdfplumber")
+
+import utils
+from synthetic import make_statement
+
+@pytest.fixture
+def ocr_calls(monkeypatch):
+    calls = []
+    def fake_batch(pages, timer=None):
+        calls.append(len(pages))
+        return [(f"page {p.page_number}", []) for p in pages]
+    monkeypatch.setattr(utils, "_ocr_pages_batch", fake_batch)
+    return calls
+
+def test_lazy_consumer_ocrs_only_what_it_pulls(ocr_calls):
+    pdf = make_statement("HDFC", pages=12, scanned=True)
+    pages = utils.iter_pages(io.BytesIO(pdf))
+    head = list(islice(pages, 1))
+    pages.close()
+    assert head[0].text == "page 1"
+    assert ocr_calls == [1]
+
+def test_batches_grow_with_demand(ocr_calls):
+    pdf = make_statement("HDFC", pages=12, scanned=True)
+    pages = list(utils.iter_pages(io.BytesIO(pdf)))
+    assert [p.text for p in pages] == [f"page {n}" for n in range(1, 13)]
+    assert ocr_calls == [1, 2, 4, 5]
+
+def test_eager_extraction_batches_from_the_start(ocr_calls):
+    pdf = make_statement("HDFC", pages=12, scanned=True)
+    utils.extract_pages(io.BytesIO(pdf))
+    assert ocr_calls == [utils.OCR_BATCH_PAGES, 12 - utils.OCR_BATCH_PAGES]
@@ -0,0 +1,66 @@
+# tests/test_page.py
+# Page.search / spans / lines_after must answer exactly what the plain regex calls answer.
+
+import random
+import re
+
+from layout import WordIndex
+from page import Page
+
+PATTERNS = [
+    re.compile(r"\d[\d,]*(?:\.\d+)?"),
+    re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}"),
+    re.compile(r"[A-Za-z]+\s+\d{1,2},?\s*\d{4}", re.IGNORECASE),
+    re.compile(r"due"),
+]
+PIECES = ["Total Amount Due", " : ", "Rs. ", "1,234.00", "5000", "12/08/2024", "March 5, 2024",
+          "Payment Due Date", "\n", "\r\n", "\n\n", " ", "Minimum Amount Due", "xx", "31/02/2024", "\r"]
+
+def _texts(seed, count):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield rnd, "".join(rnd.choice(PIECES) for _ in range(rnd.randrange(0, 60)))
+
+def test_spans_match_finditer():
+    for _rnd, text in _texts(1, 300):
+        page = Page(1, text)
+        for pat in PATTERNS:
+            starts, ends = page.spans(pat)
+            assert list(zip(starts, ends)) == [m.span() for m in pat.finditer(text)]
+
+def test_search_matches_slice_search():
+    for rnd, text in _texts(2, 500):
+        page = Page(1, text)
+        for pat in PATTERNS:
+            for _ in range(5):
+                a = rnd.randrange(0, len(text) + 2)
+                b = rnd.randrange(a, len(text) + 3)
+                m = pat.search(text[a:b])
+                assert page.search(pat, a, b) == (m.group(0) if m else None), (text, a, b)
+
+def test_lines_after_matches_split():
+    for rnd, text in _texts(3, 500):
+        page = Page(1, text)
+        for _ in range(8):
+            a = rnd.randrange(0, len(text) + 2)
+            b = a + rnd.randrange(-3, 200)
+            n = rnd.randrange(0, 4)
+            assert page.lines_after(a, b, n) == re.split(r"[\r\n]+", text[a:b])[1:1 + n], (text, a, b, n)
+
+def test_lines_after_empty_window():
+    page = Page(1, "Total Amount Due\n\n1,234.00\r\nnext")
+    for a in range(len(page.text) + 1):
+        assert page.lines_after(a, a) == []
+        assert page.lines_after(a, a - 1) == []
+    assert page.lines_after(0, len(page.text)) == ["1,234.00", "next"]
+
+def test_words_round_trip():
+    words = [{"text": "Due", "x0": 10.0, "top": 20.0, "x1": 30.0, "bottom": 32.5},
+             {"text": "Date", "left": 35, "top": 20, "width": 25, "height": 12}]
+    page = Page(1, "Due Date", words=words)
+    again = Page(1, "Due Date", words=page.words)
+    assert again.words == page.words
+    assert [w["bottom"] - w["top"] for w in page.words] == [12.5, 12.0]
+    index = page.word_index()
+    assert index.label_bbox(["due", "date"]) == (10.0, 20.0, 60.0, 32.5)
+    assert WordIndex.from_words(page.words).words_in_box(0, 31, 100, 40) == [(20.0, 10.0, "Due"), (20.0, 35.0, "Date")]
@@ -0,0 +1,71 @@
+# tests/test_preflight.py
+# Image-only pages go straight to OCR: extract_text is never run on them, and every page
+# is counted under exactly one extraction path.
+
+import io
+
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+pdfplumber = pytest.importorskip("pdfplumber")
+
+import utils
+from synthetic import make_statement
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"extract_text": 0, "ocr": 0}
+    real = pdfplumber.page.Page.extract_text
+    def extract_text(self, *a, **kw):
+        calls["extract_text"] += 1
+        return real(self, *a, **kw)
+    def fake_ocr(pages, timer=None):
+        calls["ocr"] += len(pages)
+        return [(f"page {p.page_number}", []) for p in pages]
+    monkeypatch.setattr(pdfplumber.page.Page, "extract_text", extract_text)
+    monkeypatch.setattr(utils, "_ocr_pages_batch", fake_ocr)
+    return calls
+
+def _paths(stats):
+    return {k: stats[k] for k in ("text_pages", "ocr_preflight_pages", "ocr_fallback_pages", "ocr_pages")}
+
+def _with_unused_font(pdf: bytes) -> bytes:
+    """A scan whose pages also declare a font: the preflight can't rule text out."""
+    doc = pikepdf.open(io.BytesIO(pdf))
+    font = doc.make_indirect(pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                                                BaseFont=pikepdf.Name.Helvetica))
+    for page in doc.pages:
+        page.Resources.Font = pikepdf.Dictionary(F1=font)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def test_image_only_detection():
+    with pdfplumber.open(io.BytesIO(make_statement("HDFC", pages=2, scanned=True))) as pdf:
+        assert all(utils._image_only(p) for p in pdf.pages)
+    with pdfplumber.open(io.BytesIO(make_statement("HDFC", pages=2))) as pdf:
+        assert not any(utils._image_only(p) for p in pdf.pages)
+    with pdfplumber.open(io.BytesIO(_with_unused_font(make_statement("HDFC", pages=2, scanned=True)))) as pdf:
+        assert not any(utils._image_only(p) for p in pdf.pages)
+
+def test_scanned_pages_skip_text_extraction(calls):
+    stats = utils.new_page_stats()
+    pages = utils.extract_pages(io.BytesIO(make_statement("SBI", pages=3, scanned=True)), stats)
+    assert [p.text for p in pages] == ["page 1", "page 2", "page 3"]
+    assert calls == {"extract_text": 0, "ocr": 3}
+    assert _paths(stats) == {"text_pages": 0, "ocr_preflight_pages": 3, "ocr_fallback_pages": 0, "ocr_pages": 3}
+
+def test_text_pages_are_not_ocrd(calls):
+    stats = utils.new_page_stats()
+    pages = utils.extract_pages(io.BytesIO(make_statement("SBI", pages=3)), stats)
+    assert "SBI Card" in pages[0].text and not any(p.ocr for p in pages)
+    assert calls == {"extract_text": 3, "ocr": 0}
+    assert _paths(stats) == {"text_pages": 3, "ocr_preflight_pages": 0, "ocr_fallback_pages": 0, "ocr_pages": 0}
+
+def test_empty_text_layer_falls_back_to_ocr(calls):
+    stats = utils.new_page_stats()
+    pdf = _with_unused_font(make_statement("SBI", pages=3, scanned=True))
+    pages = utils.extract_pages(io.BytesIO(pdf), stats)
+    assert all(p.ocr for p in pages)
+    assert calls == {"extract_text": 3, "ocr": 3}
+    assert _paths(stats) == {"text_pages": 0, "ocr_preflight_pages": 0, "ocr_fallback_pages": 3, "ocr_pages": 3}
@@ -0,0 +1,32 @@
+# tests/test_session.py
+# Documents that cannot be opened are reported as invalid, not as password problems;
+# the timings block reports the same page counters as the result stats.
+
+import pytest
+
+pytest.importorskip("pikepdf")
+pytest.importorskip("pdfplumber")
+
+from parser import PdfSession, parse_pdf
+from synthetic import PASSWORD, make_statement
+
+@pytest.mark.parametrize("data", [b"", b"garbage bytes", b"%PDF-1.4 truncated"])
+def test_unreadable_input_is_invalid_pdf(data):
+    result = parse_pdf(data, None)
+    assert result["error_type"] == "invalid_pdf"
+    assert result["error"] and not result["success"] and result["records"] == []
+    assert PdfSession(data).parse("any password")["error_type"] == "invalid_pdf"
+
+@pytest.mark.parametrize("password", [None, "wrong"])
+def test_encrypted_without_the_password_needs_one(password):
+    result = parse_pdf(make_statement("IDFC", encrypted=True), password)
+    assert result["error_type"] == "password_required"
+
+def test_encrypted_with_the_password_parses():
+    assert parse_pdf(make_statement("IDFC", encrypted=True), PASSWORD)["success"]
+
+def test_timings_carry_every_page_counter():
+    result = parse_pdf(make_statement("HDFC", pages=3), None, timings=True)
+    counters = result["timings"]["counters"]
+    for key, value in result["stats"].items():
+        assert counters[key] == value, key
@@ -0,0 +1,73 @@
+# timing.py
+# Optional instrumentation for parse_pdf: per-stage wall/CPU time, per-page info, counters.
+# Disabled runs use NULL_TIMER, whose methods do nothing, so the hot path pays ~nothing.
+#
+# Hooks are plain callables hook(event, data) with event "stage" or "page":
+#   "stage": {"stage": name, "wall": s, "cpu": s, **info}   (exclusive of nested stages)
+#   "page":  {"page_num": n, "ocr": bool, ...}
+
+from contextlib import contextmanager, nullcontext
+from time import perf_counter, process_time
+
+class StageTimer:
+    enabled = True
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.stages = {}    # name -> {"wall", "cpu", "calls"} (time spent in nested stages excluded)
+        self.pages = {}     # page_num -> info
+        self.counters = {}
+        self._stack = []    # [wall_in_children, cpu_in_children] per open stage
+        self._t0 = perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **info):
+        self._stack.append([0.0, 0.0])
+        w0, c0 = perf_counter(), process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = perf_counter() - w0, process_time() - c0
+            child_wall, child_cpu = self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += wall
+                self._stack[-1][1] += cpu
+            s = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            s["wall"] += wall - child_wall
+            s["cpu"] += cpu - child_cpu
+            s["calls"] += 1
+            for hook in self.hooks:
+                hook("stage", {"stage": name, "wall": wall - child_wall, "cpu": cpu - child_cpu, **info})
+
+    def page(self, page_num: int, **info):
+        rec = self.pages.setdefault(page_num, {"page_num": page_num})
+        rec.update(info)
+        for hook in self.hooks:
+            hook("page", dict(rec))
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        return {
+            "total_wall": round(perf_counter() - self._t0, 6),
+            "stages": {k: {"wall": round(v["wall"], 6), "cpu": round(v["cpu"], 6), "calls": v["calls"]}
+                       for k, v in self.stages.items()},
+            "pages": [self.pages[k] for k in sorted(self.pages)],
+            "counters": dict(self.counters),
+        }
+
+class _NullTimer:
+    enabled = False
+    _ctx = nullcontext()
+
+    def stage(self, name: str, **info):
+        return self._ctx
+
+    def page(self, page_num: int, **info):
+        pass
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+NULL_TIMER = _NullTimer()
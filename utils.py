@@ -1,11 +1,25 @@
 # utils.py - COMPLETE FIXED VERSION
-import os, re
+import io, os, re, math, mmap, shutil, hashlib, tempfile, tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
+from typing import NamedTuple
+from time import perf_counter
 from io import BytesIO
 from datetime import datetime
 import pdfplumber
 import pikepdf
 import pytesseract
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
 from PIL import Image
+from cache import DiskLRUCache
+from timing import NULL_TIMER
+from page import Page
+from config import (
+    SPOOL_MAX_BYTES, PARALLEL_CHUNKS_PER_WORKER, OCR_DPI, OCR_BATCH_PAGES,
+    OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES,
+)
 
 # Try to point pytesseract to the Windows binary if PATH is flaky
 for cand in [
@@ -17,61 +31,468 @@ for cand in [
         pytesseract.pytesseract.tesseract_cmd = cand
         break
 
-def decrypt_pdf_bytes(pdf_bytes: bytes, password: str | None) -> BytesIO:
-    """Return decrypted PDF as BytesIO. If not encrypted, returns original bytes."""
-    stream = BytesIO(pdf_bytes)
+class _MemoryViewReader(io.RawIOBase):
+    """Seekable read-only stream over a buffer. Reads slice the view, the payload is never copied."""
+
+    def __init__(self, buf, owner=None):
+        self._view = memoryview(buf).cast("B")
+        self._owner = owner  # e.g. the mmap backing the view, closed with the reader
+        self._pos = 0
+
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET: pos = offset
+        elif whence == io.SEEK_CUR: pos = self._pos + offset
+        elif whence == io.SEEK_END: pos = len(self._view) + offset
+        else: raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b):
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if self._owner is not None:
+                self._owner.close()
+        super().close()
+
+def open_source(src) -> io.IOBase:
+    """
+    Seekable binary stream over bytes, bytearray, memoryview, a file object or a path.
+    Paths are memory-mapped and buffers are wrapped as-is: nothing is copied up front.
+    """
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return BytesIO(b"")
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return _MemoryViewReader(mm, owner=mm)
+    if isinstance(src, bytes):
+        return BytesIO(src)  # CPython shares the bytes object until the BytesIO is written to
+    if isinstance(src, (bytearray, memoryview)):
+        return _MemoryViewReader(src)
+    if hasattr(src, "getbuffer"):
+        return _MemoryViewReader(src.getbuffer())
+    src.seek(0)
+    return BytesIO(src.read())
+
+def source_size(src) -> int:
+    """Size in bytes of anything accepted by open_source (without reading it)."""
+    if isinstance(src, (str, os.PathLike)):
+        return os.path.getsize(src)
+    if isinstance(src, memoryview):
+        return src.nbytes
+    if isinstance(src, (bytes, bytearray)):
+        return len(src)
+    if hasattr(src, "getbuffer"):
+        return src.getbuffer().nbytes
+    pos = src.tell(); end = src.seek(0, io.SEEK_END); src.seek(pos)
+    return end
+
+def as_buffer(src):
+    """
+    Normalize an upload to something open_source can re-open cheaply any number of times:
+    paths, bytes and buffers pass through; BytesIO exposes its buffer; other files are read once.
+    """
+    if isinstance(src, (str, os.PathLike, bytes, bytearray, memoryview)):
+        return src
+    if hasattr(src, "getbuffer"):
+        return src.getbuffer()
+    src.seek(0)
+    return src.read()
+
+def spool_pdf(pdf: pikepdf.Pdf) -> io.IOBase:
+    """Save an opened (decrypted) pikepdf document; RAM-backed up to SPOOL_MAX_BYTES, then a temp file."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    pdf.save(out); out.seek(0)
+    return out
+
+def spill_to_file(stream: io.IOBase) -> str:
+    """Copy a PDF stream to a named temp file (caller deletes it) so other processes can open it."""
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(stream, tmp)
+    return tmp.name
+
+@contextmanager
+def track_peak_memory():
+    """
+    Measure the peak Python-heap allocation inside the block (tracemalloc).
+    Yields a dict that receives "peak_bytes" on exit. Native qpdf buffers are not counted.
+    """
+    report = {"peak_bytes": 0}
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield report
+    finally:
+        report["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - base)
+        if started:
+            tracemalloc.stop()
+
+def _ocr_data_pages(data: dict) -> dict[int, tuple[str, list[dict]]]:
+    """
+    Rebuild (text, word boxes) per Tesseract page from one image_to_data result.
+    Lines break on block/par/line changes (blank line between paragraphs), like image_to_string.
+    """
+    out = {}
+    prev = {}  # page_num -> (block, par, line) of the previous word
+    for i in range(len(data["text"])):
+        t = (data["text"][i] or "").strip()
+        if not t: continue
+        pg = int(data["page_num"][i])
+        line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        parts, words = out.setdefault(pg, ([], []))
+        last = prev.get(pg)
+        if last is not None:
+            parts.append(" " if line == last else ("\n" if line[:2] == last[:2] else "\n\n"))
+        prev[pg] = line
+        parts.append(t)
+        words.append({
+            "left": int(data["left"][i]), "top": int(data["top"][i]),
+            "width": int(data["width"][i]), "height": int(data["height"][i]),
+            "text": t
+        })
+    return {pg: ("".join(parts), words) for pg, (parts, words) in out.items()}
+
+def _rasterize(page):
+    try:
+        return page.to_image(resolution=OCR_DPI).original.convert("RGB")
+    except Exception:
+        return None
+
+def _tesseract_images(images) -> list[tuple[str, list[dict]] | None]:
+    """
+    OCR images with a single Tesseract process (one TSV pass; text is rebuilt from it).
+    Several images go through one multi-page TIFF and the TSV is split back per page.
+    Returns None for an image when Tesseract failed.
+    """
+    if not images:
+        return []
     try:
-        if password:
-            with pikepdf.open(stream, password=password) as pdf:
-                out = BytesIO(); pdf.save(out); out.seek(0); return out
+        if len(images) == 1:
+            data = pytesseract.image_to_data(images[0], output_type=pytesseract.Output.DICT)
         else:
-            with pikepdf.open(stream) as pdf:
-                out = BytesIO(); pdf.save(out); out.seek(0); return out
-    except pikepdf.PasswordError:
-        raise ValueError("Incorrect password - please check and try again")
-    except Exception as e:
-        raise ValueError(f"Error reading PDF: {str(e)}")
+            with tempfile.TemporaryDirectory(prefix="ccocr_") as tmp:
+                path = os.path.join(tmp, "batch.tif")
+                images[0].save(path, save_all=True, append_images=images[1:],
+                               compression="tiff_lzw", dpi=(OCR_DPI, OCR_DPI))
+                data = pytesseract.image_to_data(path, output_type=pytesseract.Output.DICT)
+    except Exception:
+        return [None] * len(images)
+    per_page = _ocr_data_pages(data)
+    return [per_page.get(n, ("", [])) for n in range(1, len(images) + 1)]
 
-def _ocr_page(page):
+# ---- OCR cache (opt-in via OCR_CACHE_DIR) ----
+OCR_CACHE = DiskLRUCache(OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES) if OCR_CACHE_DIR else None
+
+@lru_cache(maxsize=1)
+def _tesseract_version() -> str:
     try:
-        pil = page.to_image(resolution=300).original.convert("RGB")
+        return str(pytesseract.get_tesseract_version())
     except Exception:
-        return "", []
-    text, words = "", []
+        return "unknown"
+
+def _hash_pdf_obj(h, obj, seen: set, depth: int = 0):
+    """Feed a pdfminer object graph (dicts, arrays, streams, refs) into a hash."""
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            h.update(b"R%d" % obj.objid); return
+        seen.add(obj.objid)
+        obj = resolve1(obj)
+    if depth > 32:
+        return
+    if isinstance(obj, PDFStream):
+        _hash_pdf_obj(h, obj.attrs, seen, depth + 1)
+        h.update(obj.get_rawdata() or b"")
+    elif isinstance(obj, dict):
+        for k in sorted(obj):
+            h.update(str(k).encode()); _hash_pdf_obj(h, obj[k], seen, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for v in obj:
+            _hash_pdf_obj(h, v, seen, depth + 1)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+
+def _ocr_cache_key(page) -> str | None:
+    """Hash of what gets rendered (content streams + resources + boxes) plus DPI and Tesseract version."""
     try:
-        text = pytesseract.image_to_string(pil)
+        po = page.page_obj
+        h = hashlib.sha256()
+        h.update(f"{OCR_DPI}|{_tesseract_version()}|{po.mediabox}|{po.cropbox}|{po.rotate}".encode())
+        seen = set()
+        _hash_pdf_obj(h, po.attrs.get("Contents"), seen)
+        _hash_pdf_obj(h, po.resources, seen)
+        return h.hexdigest()
     except Exception:
-        pass
+        return None
+
+def ocr_cache_stats() -> dict:
+    """Hit/miss/eviction counters of the OCR cache in this process (empty when disabled)."""
+    return dict(OCR_CACHE.stats) if OCR_CACHE is not None else {}
+
+def _ocr_pages_batch(pages, timer=NULL_TIMER) -> list[tuple[str, list[dict]]]:
+    """
+    OCR several pages; cached pages skip rasterization entirely, the rest share one
+    Tesseract run. Results follow input order.
+    """
+    results = [None] * len(pages)
+    keys = [None] * len(pages)
+    if OCR_CACHE is not None:
+        with timer.stage("ocr_cache"):
+            keys = [_ocr_cache_key(p) for p in pages]
+            for i, key in enumerate(keys):
+                if key is not None:
+                    hit = OCR_CACHE.get(key)
+                    if hit is not None:
+                        results[i] = (hit[0], hit[1])
+
+    t0 = perf_counter()
+    todo = [i for i, r in enumerate(results) if r is None]
+    with timer.stage("rasterize"):
+        images = {i: _rasterize(pages[i]) for i in todo}
+    todo = [i for i in todo if images[i] is not None]
+    with timer.stage("ocr", pages=len(todo)):
+        ocr_out = _tesseract_images([images[i] for i in todo])
+    for i, res in zip(todo, ocr_out):
+        if res is None:
+            continue
+        results[i] = res
+        if keys[i] is not None:
+            OCR_CACHE.put(keys[i], list(res))
+    if timer.enabled:
+        share = (perf_counter() - t0) / max(1, len(todo))  # one Tesseract run: split evenly
+        for i, page in enumerate(pages):
+            num = getattr(page, "page_number", None)
+            if num is not None:
+                timer.page(num, ocr_cached=i not in images, ocr_seconds=0.0 if i not in images else round(share, 6))
+    return [r if r is not None else ("", []) for r in results]
+
+def _ocr_page(page):
+    return _ocr_pages_batch([page])[0]
+
+def new_page_stats() -> dict:
+    """
+    Counters filled in by iter_pages (pages in the file vs. pages actually extracted).
+    Every extracted page takes one path: text_pages (text layer), ocr_preflight_pages
+    (image-only, OCR'd without running extract_text) or ocr_fallback_pages (extract_text
+    came back empty); ocr_pages is the sum of the last two.
+    layout_fallbacks: text pages whose word boxes a layout fallback had to extract.
+    """
+    return {"page_count": 0, "pages_materialized": 0, "ocr_pages": 0, "region_pages": 0,
+            "layout_fallbacks": 0, "text_pages": 0, "ocr_preflight_pages": 0, "ocr_fallback_pages": 0}
+
+_PATH_STATS = ("text_pages", "ocr_preflight_pages", "ocr_fallback_pages")
+_TEXT_OBJECT = re.compile(rb"\bBT\b")
+
+def _image_only(page) -> bool:
+    """
+    Preflight from the page objects, without layout analysis: no fonts, no form XObjects
+    (they carry their own resources), no text object in the content stream, and at least
+    one image. extract_text has nothing to return from such a page.
+    """
     try:
-        data = pytesseract.image_to_data(pil, output_type=pytesseract.Output.DICT)
-        for i in range(len(data["text"])):
-            t = (data["text"][i] or "").strip()
-            if not t: continue
-            words.append({
-                "left": int(data["left"][i]), "top": int(data["top"][i]),
-                "width": int(data["width"][i]), "height": int(data["height"][i]),
-                "text": t
-            })
+        po = page.page_obj
+        res = resolve1(po.resources) or {}
+        if resolve1(res.get("Font")):
+            return False
+        images = 0
+        for ref in (resolve1(res.get("XObject")) or {}).values():
+            subtype = resolve1(ref).get("Subtype")
+            if getattr(subtype, "name", subtype) != "Image":
+                return False
+            images += 1
+        if not images:
+            return False
+        for ref in po.contents or ():
+            if _TEXT_OBJECT.search(resolve1(ref).get_data() or b""):
+                return False
+        return True
     except Exception:
-        pass
-    return text or "", words
+        return False
 
-def extract_pages(pdf_stream: BytesIO) -> list[dict]:
-    """Per-page text + word boxes. OCR when no text."""
-    pages = []
-    with pdfplumber.open(pdf_stream) as pdf:
-        for idx, page in enumerate(pdf.pages, start=1):
-            try:
-                text = page.extract_text() or ""
-            except Exception:
-                text = ""
+def _word_loader(obj, timer=NULL_TIMER, stats: dict | None = None):
+    """extract_words for a pdfplumber page or crop, as a loader to run when first needed."""
+    def load() -> list[dict]:
+        if stats is not None:
+            stats["layout_fallbacks"] += 1
+        with timer.stage("extract_words"):
             try:
-                words = page.extract_words(use_text_flow=True)
+                return obj.extract_words(use_text_flow=True) or []
             except Exception:
-                words = []
-            if not text.strip():
-                text, words = _ocr_page(page)
-            pages.append({"page_num": idx, "text": normalize(text), "raw_text": text, "words": words or []})
+                return []
+    return load
+
+def _text_layer(page, idx: int, timer=NULL_TIMER, lazy_words: bool = False, stats: dict | None = None) -> Page:
+    with timer.stage("preflight"):
+        image_only = _image_only(page)
+    if image_only:
+        if stats is not None:
+            stats["ocr_preflight_pages"] += 1
+        timer.page(idx, ocr=True, preflight=True, chars=0)
+        return Page(idx, "", ocr=True)
+    with timer.stage("extract_text"):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+    scanned = not text.strip()
+    if stats is not None:
+        stats["ocr_fallback_pages" if scanned else "text_pages"] += 1
+    timer.page(idx, ocr=scanned, chars=len(text))
+    if scanned:
+        return Page(idx, normalize(text), text, ocr=True)  # text and words come from OCR
+    if lazy_words:
+        return Page(idx, normalize(text), text, loader=_word_loader(page, timer, stats))
+    return Page(idx, normalize(text), text, _word_loader(page, timer)())
+
+def _region_layer(page, idx: int, bbox, timer=NULL_TIMER, stats: dict | None = None) -> Page | None:
+    """Text (words deferred) inside a fractional (x0, top, x1, bottom) box; None when the box has no text layer."""
+    with timer.stage("preflight"):
+        if _image_only(page):
+            return None  # scanned: the full-page pass OCRs it
+    px0, ptop, px1, pbottom = (float(v) for v in page.bbox)
+    w, h = px1 - px0, pbottom - ptop
+    x0, top, x1, bottom = bbox
+    with timer.stage("extract_region"):
+        try:
+            crop = page.crop((px0 + x0 * w, ptop + top * h, px0 + x1 * w, ptop + bottom * h))
+            text = crop.extract_text() or ""
+        except Exception:
+            return None
+    if not text.strip():
+        return None  # scanned or misplaced box: the full-page pass handles it
+    return Page(idx, normalize(text), text, region=True, loader=_word_loader(crop, timer, stats))
+
+def _set_ocr(p: Page, text: str, words: list[dict]):
+    p.set_text(normalize(text), text)
+    p.set_words(words)
+
+def _iter_page_range(plumber_pages, start: int, stop: int, timer=NULL_TIMER,
+                     lazy_words: bool = False, stats: dict | None = None, ocr_batch: int = 1):
+    """
+    Yield Pages for plumber_pages[start:stop]. A run of consecutive scanned pages
+    (up to ocr_batch) is OCR'd in one Tesseract call; the first text page after the
+    run is read ahead and yielded right after it. The batch size doubles, up to
+    OCR_BATCH_PAGES, each time the consumer asks for pages past a batch, so a consumer
+    that stops early (issuer detection, region fields) never waits for pages it does
+    not use. Eager consumers pass ocr_batch=OCR_BATCH_PAGES. With lazy_words, text
+    pages extract their word boxes on first use (only while the document is open).
+    """
+    i = start
+    while i < stop:
+        p = _text_layer(plumber_pages[i], i + 1, timer, lazy_words, stats)
+        i += 1
+        if not p.ocr:
+            yield p
+            continue
+        run, after = [p], None
+        while i < stop and len(run) < ocr_batch:
+            q = _text_layer(plumber_pages[i], i + 1, timer, lazy_words, stats)
+            i += 1
+            if not q.ocr:
+                after = q
+                break
+            run.append(q)
+        for r, (text, words) in zip(run, _ocr_pages_batch([plumber_pages[r.page_num - 1] for r in run], timer)):
+            _set_ocr(r, text, words)
+            yield r
+        ocr_batch = min(2 * ocr_batch, OCR_BATCH_PAGES)  # the consumer wanted the whole batch
+        if after is not None:
+            yield after
+
+def page_ranges(page_count: int, first=()) -> list[tuple[int, int]]:
+    """[start, stop) index ranges covering every page once: pages numbered in `first`, then the rest in order."""
+    first = sorted({n for n in first if 1 <= n <= page_count})
+    ranges = [(n - 1, n) for n in first]
+    start = 0
+    for n in first + [page_count + 1]:
+        if start < n - 1:
+            ranges.append((start, n - 1))
+        start = n
+    return ranges
+
+def iter_pages(pdf_stream: io.IOBase, stats: dict | None = None, timer=NULL_TIMER, first=(), region=None,
+               lazy_words: bool = True, ocr_batch: int = 1):
+    """
+    Lazily yield per-page text + word boxes (OCR when no text).
+    A page is only extracted when the consumer asks for it; the PDF stays open
+    until the generator is exhausted or closed. Page numbers in `first` are yielded
+    before the remaining pages. `region` = (page_num, fractional bbox) yields that crop
+    (marked "region") ahead of all full pages, so a consumer that finds everything
+    there never extracts a full page. Word boxes of text pages are only extracted when
+    first used (lazy_words), so they must be used before the generator is closed.
+    Scanned pages are OCR'd in batches that grow with demand from ocr_batch (see
+    _iter_page_range).
+    """
+    with timer.stage("open_plumber"):
+        pdf = pdfplumber.open(pdf_stream)
+    with pdf:
+        if stats is not None:
+            stats["page_count"] = len(pdf.pages)
+        if region and 1 <= region[0] <= len(pdf.pages):
+            rp = _region_layer(pdf.pages[region[0] - 1], region[0], region[1], timer, stats)
+            if rp is not None:
+                if stats is not None:
+                    stats["region_pages"] += 1
+                yield rp
+        ranges = page_ranges(len(pdf.pages), first)
+        for p in chain.from_iterable(_iter_page_range(pdf.pages, a, b, timer, lazy_words, stats, ocr_batch)
+                                     for a, b in ranges):
+            if stats is not None:
+                stats["pages_materialized"] += 1
+                stats["ocr_pages"] += p.ocr
+            yield p
+
+def extract_pages(pdf_stream: io.IOBase, stats: dict | None = None) -> list[Page]:
+    """Per-page text + word boxes. OCR when no text."""
+    return list(iter_pages(pdf_stream, stats, lazy_words=False, ocr_batch=OCR_BATCH_PAGES))
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> tuple[list[Page], dict]:
+    """Process-pool worker: open the (plain) PDF itself and extract pages [start, stop)."""
+    stats = new_page_stats()
+    with pdfplumber.open(open_source(pdf_path)) as pdf:
+        return list(_iter_page_range(pdf.pages, start, min(stop, len(pdf.pages)), stats=stats,
+                                     ocr_batch=OCR_BATCH_PAGES)), stats
+
+def extract_pages_parallel(pdf_path: str, page_count: int, workers: int,
+                           stats: dict | None = None, executor=None) -> list[Page]:
+    """
+    extract_pages split over a process pool. Each worker opens pdf_path on its own;
+    pages come back in page order, the same Pages as extract_pages.
+    Pass `executor` to reuse a long-lived pool instead of spawning one per document.
+    """
+    chunk = max(1, math.ceil(page_count / (workers * PARALLEL_CHUNKS_PER_WORKER)))
+    ranges = [(i, min(i + chunk, page_count)) for i in range(0, page_count, chunk)]
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_extract_page_range, pdf_path, a, b) for a, b in ranges]
+        results = [fut.result() for fut in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+    pages = [p for chunk_pages, _ in results for p in chunk_pages]
+    if stats is not None:
+        stats["page_count"] = stats["pages_materialized"] = len(pages)
+        stats["ocr_pages"] = sum(p.ocr for p in pages)
+        for k in _PATH_STATS:
+            stats[k] = sum(chunk_stats[k] for _, chunk_stats in results)
     return pages
 
 def normalize(s: str) -> str:
@@ -81,93 +502,166 @@ def normalize(s: str) -> str:
     return s.strip()
 
 # ---- parsing helpers ----
-# Support multiple rupee symbol encodings: ₹ (U+20B9), ` (backtick in some PDFs)
-# Support ₹ / Rs, commas, decimals, explicit zeros, and optional CR/DR suffixes
-_AMOUNT_RE_GROUPS = [
-    r"(?:[₹`]|Rs\.?)?\s*0+(?:\.0{1,2})?(?:\s*(?:CR|DR))?",                    # 0 / 0.00 / ₹0.00 / 0.00 CR
-    r"(?:[₹`]|Rs\.?)?\s*\d{1,3}(?:,\d{2})*,\d{3}(?:\.\d{1,2})?(?:\s*(?:CR|DR))?",  # Indian: 1,23,456.78
-    r"(?:[₹`]|Rs\.?)?\s*\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?(?:\s*(?:CR|DR))?",        # Western: 123,456.78
-    r"(?:[₹`]|Rs\.?)?\s*\d+(?:\.\d{1,2})?(?:\s*(?:CR|DR))?",                       # Plain: 12345.67 / 12345
-]
+# One amount grammar, matched once: optional currency (₹ / ` as some PDFs encode it / Rs),
+# then Indian grouping (1,23,456), Western grouping (123,456) or plain digits, optional
+# paise/cents and an optional CR/DR suffix. The named group that matched is the format.
+# A number never starts or ends inside a longer digit run or a d/m/y, d-m-y or ISO date.
+_AMOUNT_GRAMMAR = re.compile(r"""
+    (?<![\d/.,])(?<!\d-)
+    (?:(?P<cur>[₹`]|Rs\.?)\s*)?
+    (?:(?P<indian>\d{1,2}(?:,\d{2})+,\d{3})
+      |(?P<western>\d{1,3}(?:,\d{3})+)
+      |(?P<plain>\d+))
+    (?P<frac>\.\d{1,2})?
+    (?![\d/]|[-.,]\d)
+    (?:\s*(?P<crdr>CR|DR)\b)?
+""", re.IGNORECASE | re.VERBOSE)
 
+_MAX_AMOUNT = 10_000_000_000  # larger values are IDs or account numbers run together
 
-def parse_amount(s: str | None) -> float | None:
-    if not s:
+class Amount(NamedTuple):
+    value: float     # magnitude; the CR/DR direction is in sign
+    sign: int        # -1 for CR, 1 otherwise
+    currency: str    # "₹" for ₹ / ` / Rs, "" when unmarked
+    kind: str        # "zero" | "indian" | "western" | "plain"
+    start: int       # span of the raw match in the scanned text
+    end: int
+    raw: str
+
+def _amount(m: re.Match) -> Amount | None:
+    kind = "indian" if m["indian"] else "western" if m["western"] else "plain"
+    digits = m[kind]
+    frac = m["frac"] or ""
+    # long bare integers are IDs (card, account, phone numbers), not amounts
+    if kind == "plain" and not frac and len(digits) > 10 and not m["cur"]:
+        return None
+    value = float(digits.replace(",", "") + frac)
+    if value > _MAX_AMOUNT:
         return None
+    crdr = (m["crdr"] or "").upper()
+    return Amount(value, -1 if crdr == "CR" else 1, "₹" if m["cur"] else "",
+                  "zero" if value == 0 else kind, m.start(), m.end(), m.group(0))
 
-    for pat in _AMOUNT_RE_GROUPS:
-        m = re.search(pat, s, flags=re.IGNORECASE)
-        if not m:
-            continue
+def scan_amounts(text: str) -> list[Amount]:
+    """Every amount in text, in order, from a single pass of the grammar."""
+    out = []
+    for m in _AMOUNT_GRAMMAR.finditer(text or ""):
+        a = _amount(m)
+        if a is not None:
+            out.append(a)
+    return out
 
-        token = m.group(0)
+def match_amount(s: str | None) -> Amount | None:
+    """The first amount in s."""
+    for m in _AMOUNT_GRAMMAR.finditer(s or ""):
+        a = _amount(m)
+        if a is not None:
+            return a
+    return None
 
-        # Strip currency, spaces, commas, CR/DR, parentheses
-        cleaned = token
-        cleaned = re.sub(r"\b(?:CR|DR)\b", "", cleaned, flags=re.IGNORECASE)
-        cleaned = cleaned.replace("Rs.", "").replace("Rs", "").replace("₹", "").replace("`", "")
-        cleaned = cleaned.replace(",", "").replace(" ", "")
-        cleaned = cleaned.strip("()")  # treat (1,234.00) as 1234.00
+def parse_amount(s: str | None) -> float | None:
+    a = match_amount(s)
+    return a.value if a else None
 
-        # If it's just zero-like, return 0.0 directly
-        if re.fullmatch(r"0+(?:\.0{1,2})?", cleaned):
-            return 0.0
 
-        # Guard against absurd long integers with no commas/decimals (likely IDs)
-        if "." not in cleaned and len(cleaned) > 10 and not token.strip().startswith(("₹", "Rs", "`")):
-            continue
+# Date patterns - support various formats
+_DATE_PATTERNS = [
+    r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}",           # 05/09/2022 or 5-9-2022
+    r"\d{1,2}\s+[A-Za-z]{3,}\s+\d{2,4}",        # 5 September 2022 or 5 Sep 2022
+    r"[A-Za-z]{3,}\s+\d{1,2},?\s*\d{4}",        # September 5, 2022 or Sep 5 2022
+    r"\d{4}-\d{2}-\d{2}"                        # 2022-09-05 (ISO format)
+]
+_DATE_FORMATS = [
+    "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y",
+    "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
+    "%Y-%m-%d",
+]
 
+def _strptime_token(token: str) -> str | None:
+    for fmt in _DATE_FORMATS:
         try:
-            val = float(cleaned)
+            return datetime.strptime(token, fmt).date().isoformat()
         except ValueError:
             continue
+    return None
 
-        # Final sanity: ignore impossibly huge values (ID conflation)
-        if val > 10_000_000_000:
-            continue
+def _parse_date_strptime(s: str | None) -> str | None:
+    """Reference implementation: the first match of each pattern against every strptime format."""
+    if not s: return None
+    for pat in _DATE_PATTERNS:
+        m = re.search(pat, s)
+        if not m: continue
+        parsed = _strptime_token(m.group(0).replace(",", "").strip())
+        if parsed:
+            return parsed
+    return None
 
-        return val
+# The same four patterns with named groups. Each match is validated directly, without
+# strptime and without exceptions. The rules below are exactly what strptime accepts for
+# the formats above: %d and %m take 1-2 digits, %Y exactly 4 and %y exactly 2 (69-99 ->
+# 19xx); month names are the English full or 3-letter names in any case; a comma between
+# day and year only counts when whitespace follows it.
+_DATE_RES = [
+    re.compile(r"(?P<d>\d{1,2})(?P<s1>[/-])(?P<m>\d{1,2})(?P<s2>[/-])(?P<y>\d{2,4})"),
+    re.compile(r"(?P<d>\d{1,2})\s+(?P<mon>[A-Za-z]{3,})\s+(?P<y>\d{2,4})"),
+    re.compile(r"(?P<mon>[A-Za-z]{3,})\s+(?P<d>\d{1,2}),?(?P<sp>\s*)(?P<y>\d{4})"),
+    re.compile(r"(?P<y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2})"),
+]
+_MONTH_NUM = {}
+for _i, _name in enumerate(["january", "february", "march", "april", "may", "june", "july",
+                            "august", "september", "october", "november", "december"], 1):
+    _MONTH_NUM[_name] = _MONTH_NUM[_name[:3]] = _i
 
-    return None
+_MONTH_DAYS = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
 
+def _iso(y: int, m: int, d: int) -> str | None:
+    if y < 1 or not (1 <= m <= 12) or d < 1:
+        return None
+    leap = m == 2 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+    if d > _MONTH_DAYS[m] + leap:
+        return None
+    return f"{y:04d}-{m:02d}-{d:02d}"
 
-# Date patterns - support various formats
-_DATE_PATTERNS = [
-    r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}",           # 05/09/2022 or 5-9-2022
-    r"\d{1,2}\s+[A-Za-z]{3,}\s+\d{2,4}",        # 5 September 2022 or 5 Sep 2022
-    r"[A-Za-z]{3,}\s+\d{1,2},?\s*\d{4}",        # September 5, 2022 or Sep 5 2022
-    r"\d{4}-\d{2}-\d{2}"                        # 2022-09-05 (ISO format)
-]
+def _date_from_match(kind: int, m: re.Match) -> str | None:
+    g = m.groupdict()
+    if kind == 0:
+        if g["s1"] != g["s2"] or len(g["y"]) == 3:
+            return None
+        y = int(g["y"])
+        if len(g["y"]) == 2:
+            y += 1900 if y >= 69 else 2000
+        return _iso(y, int(g["m"]), int(g["d"]))
+    if kind in (1, 2):
+        month = _MONTH_NUM.get(g["mon"].lower())
+        if month is None or len(g["y"]) != 4 or (kind == 2 and not g["sp"]):
+            return None
+        return _iso(int(g["y"]), month, int(g["d"]))
+    return _iso(int(g["y"]), int(g["m"]), int(g["d"]))
 
+@lru_cache(maxsize=8192)
 def parse_date(s: str | None) -> str | None:
     """
     Parse various date formats and return ISO format (YYYY-MM-DD).
     Handles full month names like 'September 5, 2022'.
+    Same output as _parse_date_strptime; tokens are memoized.
     """
     if not s: return None
-    
-    for pat in _DATE_PATTERNS:
-        m = re.search(pat, s)
+    for kind, rx in enumerate(_DATE_RES):
+        m = rx.search(s)
         if not m: continue
-        
-        token = m.group(0).replace(",", "").strip()
-        # Try all date formats - order matters
-        for fmt in [
-            "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y",
-            "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
-            "%Y-%m-%d",
-        ]:
-            try:
-                parsed = datetime.strptime(token, fmt).date()
-                return parsed.isoformat()
-            except ValueError:
-                continue
+        token = m.group(0)
+        if token.isascii():
+            parsed = _date_from_match(kind, m)
+        else:  # non-ASCII digits: leave strptime's exact digit rules to strptime
+            parsed = _strptime_token(token.replace(",", "").strip())
+        if parsed:
+            return parsed
     return None
 
 # Card number patterns - prefer last4, else last2
 LAST4_16 = r"\b\d{4}\s\d{4}\s\d{4}\s(\d{4})\b"
-MASKED4 = r"(?:\*|X){2,}\s?(\d{4})"
-MASKED2 = r"(?:\*|X){2,}\s?(\d{2})\b|\bXX(\d{2})\b|\b\*\*(\d{2})\b"
+MASKED4 = r"(?<![*X])(?:\*|X){2,}\s?(\d{4})"
+MASKED2 = r"(?<![*X])(?:\*|X){2,}\s?(\d{2})\b|\bXX(\d{2})\b|\b\*\*(\d{2})\b"
 
 def last_tail(text: str) -> tuple[str, int]:
     """